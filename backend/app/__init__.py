@@ -1,7 +1,10 @@
 from flask import Flask
 from flask_cors import CORS
 
-from .routes import core_bp, products_bp, dashboard_bp, swiped_bp
+from helpers.change_feed import start_catalog_feed
+
+from .warmup import start_warmup
+from .routes import core_bp, products_bp, dashboard_bp, swiped_bp, chat_bp
 
 
 def create_app(config_name: str | None = None) -> Flask:
@@ -16,5 +19,12 @@ def create_app(config_name: str | None = None) -> Flask:
     app.register_blueprint(products_bp, url_prefix="/api/products")
     app.register_blueprint(dashboard_bp, url_prefix="/api/dashboard")
     app.register_blueprint(swiped_bp, url_prefix="/api")
+    app.register_blueprint(chat_bp)
+
+    # No-op unless CATALOG_FEED_POLL / CATALOG_FEED_REALTIME are set.
+    start_catalog_feed()
+
+    if app.config["WARMUP_ENABLED"]:
+        start_warmup(app.config["WARMUP_TIMEOUT"])
 
     return app
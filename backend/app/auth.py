@@ -0,0 +1,108 @@
+"""
+Per-request user identity from Supabase access tokens.
+
+The frontend sends the Supabase session's access token as
+``Authorization: Bearer <jwt>``. It is verified with the project's JWT secret
+(HS256, audience ``authenticated``). Its ``sub`` claim is the auth user's
+uuid, which is mapped to the integer ``users.id`` that ``user_products`` and
+the profile code use, through ``users.auth_id``. A verified account without a
+``users`` row gets one on its first request. If the mapping can't be resolved
+the request is refused; it never falls back to another user.
+
+With ``AUTH_REQUIRED`` off (the Dev config) a request without a token is
+served as ``DEV_USER_ID``, the single shopper the app used to hard-code.
+"""
+
+import os
+import uuid
+from functools import lru_cache, wraps
+
+import jwt
+from flask import current_app, g, jsonify, request
+from postgrest.exceptions import APIError
+
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET", "")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+DEV_USER_ID = 1
+
+
+class AuthError(Exception):
+    def __init__(self, message: str, status: int = 401):
+        super().__init__(message)
+        self.status = status
+
+
+def auth_id_from_token(token: str) -> str:
+    """Verify the token and return its ``sub`` (the auth user's uuid)."""
+    if not SUPABASE_JWT_SECRET:
+        raise AuthError("SUPABASE_JWT_SECRET is not set", status=503)
+    try:
+        claims = jwt.decode(
+            token,
+            SUPABASE_JWT_SECRET,
+            algorithms=["HS256"],
+            audience=SUPABASE_JWT_AUDIENCE,
+            options={"require": ["exp", "sub"]},
+        )
+        return str(uuid.UUID(claims["sub"]))
+    except (jwt.PyJWTError, ValueError, TypeError) as exc:
+        raise AuthError(f"Invalid token: {exc}") from exc
+
+
+@lru_cache(maxsize=100_000)
+def user_id_for_auth_id(auth_id: str) -> int:
+    """``users.id`` linked to an auth uuid, creating the row on first use.
+
+    Only successful lookups are cached; errors raise ``AuthError``.
+    """
+    from supabase_client import supabase
+
+    def lookup():
+        res = supabase.table("users").select("id").eq("auth_id", auth_id).limit(1).execute()
+        return int(res.data[0]["id"]) if res.data else None
+
+    try:
+        user_id = lookup()
+        if user_id is not None:
+            return user_id
+        try:
+            res = supabase.table("users").insert({"auth_id": auth_id}).execute()
+            if res.data:
+                return int(res.data[0]["id"])
+        except APIError:
+            # Lost a race with a concurrent first request; its row is there now.
+            pass
+        user_id = lookup()
+    except APIError as exc:
+        raise AuthError(f"Could not resolve user: {exc.message}", status=503) from exc
+    if user_id is None:
+        raise AuthError("No user linked to this account", status=403)
+    return user_id
+
+
+def current_user_id() -> int:
+    """The authenticated user for this request; raises ``AuthError``."""
+    header = request.headers.get("Authorization", "")
+    scheme, _, token = header.partition(" ")
+    if scheme.lower() == "bearer" and token.strip():
+        return user_id_for_auth_id(auth_id_from_token(token.strip()))
+    if current_app.config.get("AUTH_REQUIRED", True):
+        raise AuthError("Missing bearer token")
+    return DEV_USER_ID
+
+
+def require_user(view):
+    """Resolve the caller into ``g.user_id`` or refuse the request."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        try:
+            g.user_id = current_user_id()
+        except AuthError as exc:
+            response = jsonify({"error": str(exc)})
+            if exc.status == 401:
+                response.headers["WWW-Authenticate"] = 'Bearer realm="api"'
+            return response, exc.status
+        return view(*args, **kwargs)
+
+    return wrapper
@@ -1,9 +1,16 @@
 class BaseConfig:
     JSON_SORT_KEYS = False
+    # Preload caches/indexes in the background; /api/ready reports progress.
+    WARMUP_ENABLED = True
+    WARMUP_TIMEOUT = 30.0
+    # Reject /api requests without a valid Supabase access token.
+    AUTH_REQUIRED = True
 
 
 class DevConfig(BaseConfig):
     DEBUG = True
+    # Requests without a token act as the single dev user.
+    AUTH_REQUIRED = False
 
 
 class ProdConfig(BaseConfig):
@@ -0,0 +1,88 @@
+"""
+Response shaping for product endpoints.
+
+Every product that leaves the API goes through an explicit projection, so
+internal columns such as ``embedding`` (768 floats per row) never reach the
+browser. Payloads are encoded with orjson and compressed with brotli or gzip,
+whichever the client prefers. Both packages are in requirements.txt; without
+them the module falls back to the stdlib json encoder and gzip.
+"""
+
+import gzip
+import json
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+CATALOG_FIELDS = (
+    "id",
+    "external_id",
+    "name",
+    "description",
+    "price",
+    "category",
+    "image_url",
+    "tags",
+    "created_at",
+)
+
+# Public fields per endpoint family; anything not listed is dropped.
+PROJECTIONS = {
+    "catalog": CATALOG_FIELDS,
+    "swipe_card": ("id", "name", "description", "price", "category", "image_url", "tags"),
+    "similar": ("id", "name", "description", "price", "category", "image_url", "tags", "score"),
+}
+
+# Below this size compression costs more than it saves.
+MIN_COMPRESS_BYTES = 1024
+
+
+def project(row: dict | None, projection: str) -> dict | None:
+    if row is None:
+        return None
+    return {field: row[field] for field in PROJECTIONS[projection] if field in row}
+
+
+def project_many(rows, projection: str) -> list[dict]:
+    fields = PROJECTIONS[projection]
+    return [{field: row[field] for field in fields if field in row} for row in rows]
+
+
+def _dumps(payload) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str).encode()
+
+
+def _accepted_encoding() -> str | None:
+    """The client's preferred encoding we support; ``q=0`` refuses one."""
+    offered = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return request.accept_encodings.best_match(offered)
+
+
+def json_response(payload, status: int = 200) -> Response:
+    """Encode ``payload`` as JSON, compressing it when worthwhile."""
+    body = _dumps(payload)
+    response = Response(body, status=status, mimetype="application/json")
+    response.vary.add("Accept-Encoding")
+
+    encoding = _accepted_encoding() if len(body) >= MIN_COMPRESS_BYTES else None
+    if encoding == "br":
+        response.set_data(brotli.compress(body, quality=4))
+    elif encoding == "gzip":
+        response.set_data(gzip.compress(body, compresslevel=5))
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
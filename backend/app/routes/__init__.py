@@ -2,5 +2,6 @@ from .core import core_bp
 from .products import products_bp
 from .dashboard import dashboard_bp
 from .swipes import swiped_bp
+from .chat import chat_bp
 
-__all__ = ["core_bp", "products_bp", "dashboard_bp", "swiped_bp"]
+__all__ = ["core_bp", "products_bp", "dashboard_bp", "swiped_bp", "chat_bp"]
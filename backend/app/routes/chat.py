@@ -0,0 +1,33 @@
+from flask import Blueprint, g, jsonify, request
+
+from helpers.algorithm import get_user_profile_embedding
+from services.chat_cache import cached_chat
+from services.rate_limit import GeminiUnavailable
+from ..auth import require_user
+
+chat_bp = Blueprint("chat", __name__)
+
+
+@chat_bp.route("/api/chat", methods=["POST"])
+@require_user
+def chat():
+    data = request.get_json(force=True) or {}
+    message = data.get("message", "")
+    history = data.get("history", [])
+
+    if not message:
+        return jsonify({"error": "No message"}), 400
+
+    try:
+        user_embedding = get_user_profile_embedding(g.user_id)
+    except Exception as e:  # noqa: BLE001
+        # A missing taste profile only costs cache hits; still answer.
+        print(f"[chat] Could not load profile for user {g.user_id}: {e!r}")
+        user_embedding = None
+
+    try:
+        # The user's taste is part of the cache key: same question, different style.
+        reply = cached_chat(message, history, user_embedding, g.user_id)
+    except GeminiUnavailable as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": str(max(1, round(e.retry_after)))}
+    return jsonify({"reply": reply})
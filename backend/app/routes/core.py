@@ -1,8 +1,31 @@
 from flask import Blueprint, jsonify
 
+from helpers.single_flight import supabase_flight
+from helpers.user_state import user_states
+from services.chat_cache import chat_cache
+from services.gemini_client import gemini
+from ..warmup import readiness
+
 core_bp = Blueprint("core", __name__)
 
 
 @core_bp.get("/api/health")
 def health():
     return jsonify(status="ok")
+
+
+@core_bp.get("/api/ready")
+def ready():
+    """Readiness probe: 503 until warm-up has finished (or run out of time)."""
+    snapshot = readiness.snapshot()
+    return jsonify(snapshot), 200 if snapshot["ready"] else 503
+
+
+@core_bp.get("/api/metrics")
+def metrics():
+    return jsonify(
+        single_flight=supabase_flight.metrics(),
+        gemini=gemini.metrics(),
+        chat_cache=chat_cache.metrics(),
+        user_state=user_states.metrics(),
+    )
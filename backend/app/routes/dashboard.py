@@ -2,13 +2,23 @@ from flask import Blueprint, jsonify, request
 from db_service import get_all, get_by_id, create_record, update_record, delete_record
 from .products import get_products_from_supabase
 from services.embedding_client import embed_product
+from services.rate_limit import GeminiUnavailable
+from helpers.change_feed import catalog_feed
+from helpers.bulk_import import iter_rows, import_products
+from ..responses import json_response, project, project_many
 dashboard_bp = Blueprint("dashboard", __name__)
 
 
+def _gemini_unavailable(e: GeminiUnavailable):
+    response = jsonify({"error": str(e)})
+    response.headers["Retry-After"] = str(max(1, round(e.retry_after)))
+    return response, 503
+
+
 @dashboard_bp.route("/products", methods=["GET"])
 def list_products():
    products = get_products_from_supabase()
-   return jsonify(products)
+   return json_response(project_many(products, "catalog"))
 
 
 @dashboard_bp.route("/products/<int:product_id>", methods=["GET"])
@@ -16,7 +26,7 @@ def fetch_one(product_id):
     data = get_by_id("products", product_id)
     if not data:
         return jsonify({"error": "Not found"}), 404
-    return jsonify(data)
+    return jsonify(project(data, "catalog"))
 
 
 @dashboard_bp.route("/products", methods=["POST"])
@@ -29,11 +39,43 @@ def create():
         embedding = embed_product(data)
         data["embedding"] = embedding
         record = create_record("products", data)
-        return jsonify(record), 201
+        catalog_feed.emit_upsert(record)
+        return jsonify(project(record, "catalog")), 201
+    except GeminiUnavailable as e:
+        return _gemini_unavailable(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@dashboard_bp.route("/products/bulk", methods=["POST"])
+def bulk_create():
+    """Import many products from a JSONL or CSV upload.
+
+    Send the file as the raw request body (Content-Type text/csv or
+    application/x-ndjson, or ?format=csv|jsonl), or as the "file" field of a
+    multipart form.
+    """
+    upload = request.files.get("file")
+    if upload is not None:
+        stream = upload.stream
+        name_or_type = f"{upload.filename or ''} {upload.mimetype or ''}"
+    else:
+        stream = request.stream
+        name_or_type = request.mimetype or ""
+
+    fmt = request.args.get("format") or ("csv" if "csv" in name_or_type.lower() else "jsonl")
+    if fmt not in ("csv", "jsonl"):
+        return jsonify({"error": "format must be 'csv' or 'jsonl'"}), 400
+
+    report = import_products(iter_rows(stream, fmt))
+    summary = report["summary"]
+    if not summary["rows"]:
+        return jsonify({"error": "Upload contains no rows"}), 400
+    # 207 when any row failed: still a success status, so clients read the per-row results.
+    status = 201 if not summary["failed"] else 207
+    return jsonify(report), status
+
+
 @dashboard_bp.route("/products/<int:product_id>", methods=["PUT"])
 def update(product_id):
     try:
@@ -45,7 +87,10 @@ def update(product_id):
         record = update_record("products", product_id, updates)
         if not record:
             return jsonify({"error": "Product not found"}), 404
-        return jsonify(record)
+        catalog_feed.emit_upsert(record)
+        return jsonify(project(record, "catalog"))
+    except GeminiUnavailable as e:
+        return _gemini_unavailable(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -56,7 +101,8 @@ def delete(product_id):
         record = delete_record("products", product_id)
         if not record:
             return jsonify({"error": "Product not found"}), 404
-        return jsonify({"message": "Product deleted successfully", "data": record})
+        catalog_feed.emit_delete(product_id)
+        return jsonify({"message": "Product deleted successfully", "data": project(record, "catalog")})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
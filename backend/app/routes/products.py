@@ -2,6 +2,10 @@ from flask import Blueprint, jsonify, request
 import requests
 from supabase_client import SUPABASE_URL, SUPABASE_KEY
 from services.embedding_client import embed_product
+from helpers.single_flight import query_key, supabase_flight
+from helpers.neighbours import get_neighbour_table
+from catalog_replica import get_replica
+from ..responses import json_response, project_many
 
 
 products_bp = Blueprint("products", __name__, url_prefix="/")
@@ -67,19 +71,22 @@ def get_products_from_supabase() -> list:
     """Fetch products data from Supabase."""
     from supabase import create_client, Client
 
+    replica = get_replica()
+    if replica is not None:
+        return replica.all()
+
     if not SUPABASE_URL or not SUPABASE_KEY:
         raise ValueError("Supabase URL or Key is not set.")
 
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
     # Only select fields needed for display, exclude heavy embedding field
-    response = (
-        supabase.table("products")
-        .select(
-            "id, external_id, name, description, price, category, image_url, tags, created_at"
-        )
-        .execute()
-    )
-    return response.data
+    columns = "id, external_id, name, description, price, category, image_url, tags, created_at"
+
+    def fetch():
+        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        return supabase.table("products").select(columns).execute().data
+
+    # Concurrent identical loads share one query; treat the result as read-only.
+    return supabase_flight.do(query_key("products", columns), fetch)
 
 
 @products_bp.get("/")
@@ -87,7 +94,7 @@ def get_products_from_supabase() -> list:
 def list_products():
     """List products from Supabase"""
     products = get_products_from_supabase()
-    return jsonify(products)
+    return json_response(project_many(products, "catalog"))
 
 
 @products_bp.get("/send-to-supabase")
@@ -97,6 +104,20 @@ def send_to_supabase():
     return jsonify({"status": "Products added to Supabase successfully."})
 
 
+@products_bp.get("/<int:product_id>/similar")
+def similar_products(product_id):
+    """More-like-this products from the precomputed neighbour table"""
+    limit = request.args.get("limit", 10, type=int)
+    table = get_neighbour_table()
+    if table is None:
+        return jsonify({"error": "Neighbour table has not been built yet"}), 503
+
+    neighbours = table.similar(product_id, limit=max(1, limit))
+    if neighbours is None:
+        return jsonify({"error": "Not found"}), 404
+    return json_response({"products": project_many(neighbours, "similar"), "count": len(neighbours)})
+
+
 @products_bp.get("/search")
 def search_products():
     """Search products by name, description, category, or tags"""
@@ -108,24 +129,27 @@ def search_products():
     try:
         from supabase import create_client, Client
 
+        replica = get_replica()
+        if replica is not None:
+            results = replica.search(query)
+            return json_response({"products": project_many(results, "catalog"), "count": len(results)})
+
         if not SUPABASE_URL or not SUPABASE_KEY:
             raise ValueError("Supabase URL or Key is not set.")
 
-        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        
         # Search in name, description, category, and tags
         # Using ilike for case-insensitive search
         query_pattern = f"%{query}%"
-        
-        response = (
-            supabase.table("products")
-            .select("id, external_id, name, description, price, category, image_url, tags, created_at")
-            .or_(f"name.ilike.{query_pattern},description.ilike.{query_pattern},category.ilike.{query_pattern}")
-            .execute()
-        )
-        
+        columns = "id, external_id, name, description, price, category, image_url, tags, created_at"
+        match = f"name.ilike.{query_pattern},description.ilike.{query_pattern},category.ilike.{query_pattern}"
+
+        def fetch():
+            supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+            return supabase.table("products").select(columns).or_(match).execute().data
+
         # Also filter by tags client-side (since Supabase array search can be tricky)
-        results = response.data
+        # Copy: the coalesced result is shared with concurrent identical searches.
+        results = list(supabase_flight.do(query_key("products", columns, ("or", match)), fetch))
         query_lower = query.lower()
         
         # Add products that match in tags
@@ -136,7 +160,7 @@ def search_products():
                 if tags and any(query_lower in tag.lower() for tag in tags):
                     results.append(product)
         
-        return jsonify({"products": results, "count": len(results)})
+        return json_response({"products": project_many(results, "catalog"), "count": len(results)})
     
     except Exception as e:
         print(f"Search error: {e}")
@@ -1,15 +1,18 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, g, jsonify, request
 import numpy as np
 from postgrest.exceptions import APIError
 from supabase_client import supabase
 from helpers.algorithm import get_next_best_product
+from helpers.profile_history import SwipeRecord, profile_digest, profile_history
+from helpers.user_state import user_states
+from ..auth import require_user
+from ..responses import json_response, project
 
 
 swiped_bp = Blueprint("swipes", __name__)
 
 
 ALPHA = 0.1  # learning rate; higher = adapt faster
-USER_ID = 1
 
 
 def get_product_embedding(product_id: int) -> np.ndarray | None:
@@ -66,7 +69,7 @@ def get_user_profile(user_id: int):
             return None
         raise
 
-    if not data:
+    if not data or data.get("embedding") is None:
         return None
     raw = data.get("embedding")
     if isinstance(raw, str):
@@ -97,6 +100,12 @@ def upsert_user_profile(
     supabase.table("users").upsert(payload, on_conflict="id").execute()
 
 
+def clear_user_profile(user_id: int):
+    """Back to cold start: no vector, no counts."""
+    payload = {"id": user_id, "embedding": None, "total_likes": 0, "total_dislikes": 0}
+    supabase.table("users").upsert(payload, on_conflict="id").execute()
+
+
 def update_user_embedding(user_id: int, product_id: int, liked: bool):
     print(
         f"[swipes] Updating embedding for user {user_id}, product {product_id}, liked={liked}"
@@ -106,6 +115,7 @@ def update_user_embedding(user_id: int, product_id: int, liked: bool):
         print(
             f"[swipes] Skipping embedding update; product {product_id} missing embedding/row."
         )
+        profile_history.push(user_id, SwipeRecord(product_id, liked, None, 0, 0, applied=False))
         return
 
     existing = get_user_profile(user_id)
@@ -117,8 +127,10 @@ def update_user_embedding(user_id: int, product_id: int, liked: bool):
         u_new = direction * e
         total_likes = 1 if liked else 0
         total_dislikes = 0 if liked else 1
+        previous = (None, 0, 0)
     else:
         u, total_likes, total_dislikes = existing
+        previous = (u, total_likes, total_dislikes)
         # Simple exponential moving average
         u_new = (1 - ALPHA) * u + ALPHA * direction * e
         if liked:
@@ -127,45 +139,170 @@ def update_user_embedding(user_id: int, product_id: int, liked: bool):
             total_dislikes += 1
 
     upsert_user_profile(user_id, u_new, total_likes, total_dislikes)
+    profile_history.push(
+        user_id, SwipeRecord(product_id, liked, *previous, written=profile_digest(u_new))
+    )
+
+
+def _forget_swipe(user_id: int, product_id: int):
+    """Delete the swipe row and put the product back in the candidate pool."""
+    supabase.table("user_products").delete().eq("user_id", user_id).eq(
+        "product_id", product_id
+    ).execute()
+    state = user_states.get(user_id)
+    with state.lock:
+        state.seen.discard(product_id)
+
+
+def _latest_swipe(user_id: int) -> dict | None:
+    """The user's most recently logged swipe row, or None."""
+    res = (
+        supabase.table("user_products")
+        .select("product_id, liked")
+        .eq("user_id", user_id)
+        .order("created_at", desc=True)
+        .limit(1)
+        .execute()
+    )
+    return res.data[0] if res.data else None
+
+
+def _snapshot_is_current(user_id: int, record: SwipeRecord) -> bool:
+    """Whether ``record`` is still the user's latest swipe and profile write.
+
+    Not so when another worker handled a later swipe or a rebuild rewrote the
+    profile; restoring the snapshot would then drop that newer state.
+    """
+    latest = _latest_swipe(user_id)
+    if latest is None or latest["product_id"] != record.product_id:
+        return False
+    if not record.applied:
+        return True
+    existing = get_user_profile(user_id)
+    return existing is not None and profile_digest(existing[0]) == record.written
+
+
+def _undo_by_inversion(user_id: int) -> dict | None:
+    """Undo the latest logged swipe by inverting its EMA step.
+
+    Used when this process has no current history for the user (e.g. the
+    swipe was handled by another worker).
+    """
+    latest = _latest_swipe(user_id)
+    if latest is None:
+        return None
+    product_id = latest["product_id"]
+    liked = bool(latest["liked"])
+
+    e = get_product_embedding(product_id)
+    existing = get_user_profile(user_id)
+    if e is not None and existing is not None:
+        u, total_likes, total_dislikes = existing
+        if liked:
+            total_likes = max(0, total_likes - 1)
+        else:
+            total_dislikes = max(0, total_dislikes - 1)
+        if total_likes + total_dislikes == 0:
+            clear_user_profile(user_id)
+        else:
+            direction = 1.0 if liked else -1.0
+            u_prev = (u - ALPHA * direction * e) / (1 - ALPHA)
+            upsert_user_profile(user_id, u_prev, total_likes, total_dislikes)
+
+    _forget_swipe(user_id, product_id)
+    return {"product_id": product_id, "liked": liked}
+
+
+def undo_last_swipe(user_id: int) -> dict | None:
+    """Revert the user's most recent swipe in O(1). None if there is nothing to undo."""
+    state = user_states.get(user_id)
+    # Under the user's lock, so a swipe can't land between the pop and the restore.
+    with state.lock:
+        # The profile is about to move back; rank the next batch against it.
+        state.pending = []
+        record = profile_history.pop(user_id)
+        if record is None:
+            return _undo_by_inversion(user_id)
+        if not _snapshot_is_current(user_id, record):
+            # Older snapshots predate the same newer state; none can be restored.
+            profile_history.clear(user_id)
+            return _undo_by_inversion(user_id)
+
+        if record.applied:
+            if record.previous is None:
+                clear_user_profile(user_id)
+            else:
+                upsert_user_profile(
+                    user_id, record.previous, record.total_likes, record.total_dislikes
+                )
+        _forget_swipe(user_id, record.product_id)
+        return {"product_id": record.product_id, "liked": record.liked}
+
+
+def register_swipe(user_id: int, product_id: int, liked: bool):
+    """Log the swipe and move the user's profile one EMA step."""
+    # The read -> EMA -> upsert -> history push must not interleave with
+    # another swipe or an undo by the same user, or a step gets lost.
+    state = user_states.get(user_id)
+    with state.lock:
+        # The rest of the MMR batch was ranked for the old profile; drop it so
+        # this swipe shapes the very next product.
+        state.pending = []
+        supabase.table("user_products").upsert(
+            {
+                "user_id": user_id,
+                "product_id": product_id,
+                "liked": liked,
+            },
+            on_conflict="user_id,product_id",
+        ).execute()
+
+        try:
+            update_user_embedding(user_id, product_id, liked)
+        except Exception as e:
+            # log / handle, but don't crash the request
+            print(f"[swipes] Error updating embedding for product {product_id}: {e!r}")
+            # The swipe row exists but the profile didn't move; undo must still
+            # pop this swipe, not the one before it.
+            profile_history.push(user_id, SwipeRecord(product_id, liked, None, 0, 0, applied=False))
 
 
 @swiped_bp.route("/register-swipe", methods=["POST"])
+@require_user
 def swipe():
     data = request.get_json(force=True) or {}
     if not data:
         return jsonify({"error": "Missing JSON payload"}), 400
 
-    user_id = USER_ID
+    user_id = g.user_id
     product_id = int(data["product_id"])
     liked = bool(data["liked"])
     print(
         f"[swipes] Incoming swipe payload user={user_id} product={product_id} liked={liked}"
     )
 
-    supabase.table("user_products").upsert(
-        {
-            "user_id": user_id,
-            "product_id": product_id,
-            "liked": liked,
-        },
-        on_conflict="user_id,product_id",
-    ).execute()
+    register_swipe(user_id, product_id, liked)
+    return jsonify({"status": "ok"})
 
-    try:
-        update_user_embedding(user_id, product_id, liked)
-    except Exception as e:
-        # log / handle, but don't crash the request
-        print(f"[swipes] Error updating embedding for product {product_id}: {e!r}")
 
-    return jsonify({"status": "ok"})
+@swiped_bp.route("/undo-swipe", methods=["POST"])
+@require_user
+def undo_swipe():
+    undone = undo_last_swipe(g.user_id)
+    if undone is None:
+        return jsonify({"error": "Nothing to undo"}), 404
+    print(f"[swipes] Undid swipe user={g.user_id} product={undone['product_id']}")
+    return jsonify({"status": "ok", **undone})
 
 
 @swiped_bp.get("/next-product")
+@require_user
 def next_product():
 
-    product = get_next_best_product(USER_ID)
+    product = get_next_best_product(g.user_id)
 
     if product is None:
         return jsonify({"product": None, "message": "No more products available"}), 200
 
-    return jsonify({"product": product})
+    # Candidates carry their embedding for scoring; never ship it to the browser.
+    return json_response({"product": project(product, "swipe_card")})
@@ -0,0 +1,191 @@
+"""
+Background warm-up and readiness reporting.
+
+A fresh worker would otherwise make its first users pay for opening the
+Supabase connection, loading the local replica, attaching the shared catalog,
+loading the neighbour table and initialising NumPy/BLAS. ``start_warmup`` does all of that on a background
+thread right after ``create_app``; ``/api/ready`` reports per-component
+progress so a load balancer only routes to warmed workers. Past the deadline a
+worker whose components are merely slow is served degraded, but one with a
+failed component stays unready while the component is retried.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+# First retry delay for a failed component (seconds); doubles up to the max.
+RETRY_DELAY = 5.0
+MAX_RETRY_DELAY = 60.0
+
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"
+SKIPPED = "skipped"
+FAILED = "failed"
+TIMED_OUT = "timed_out"
+
+
+class Readiness:
+    """Thread-safe per-component warm-up status."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.components: dict[str, dict] = {}
+        self.deadline: float | None = None
+
+    def register(self, name: str):
+        with self._lock:
+            self.components[name] = {"status": PENDING}
+
+    def update(self, name: str, status: str, only_if: str | None = None, **info):
+        with self._lock:
+            if only_if is None or self.components[name]["status"] == only_if:
+                self.components[name] = {"status": status, **info}
+
+    @property
+    def warmed(self) -> bool:
+        with self._lock:
+            return all(c["status"] in (READY, SKIPPED) for c in self.components.values())
+
+    @property
+    def failed(self) -> list[str]:
+        with self._lock:
+            return [name for name, c in self.components.items() if c["status"] == FAILED]
+
+    @property
+    def degraded(self) -> bool:
+        """Warm-up ran out of time with work left; serve cold rather than never."""
+        past_deadline = self.deadline is not None and time.monotonic() > self.deadline
+        return past_deadline and not self.warmed
+
+    @property
+    def ready(self) -> bool:
+        # Slow components may finish while serving; a failed one (Supabase
+        # unreachable, say) means this worker can't serve, deadline or not.
+        return self.warmed or (self.degraded and not self.failed)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            components = {name: dict(info) for name, info in self.components.items()}
+        return {"ready": self.ready, "degraded": self.degraded, "components": components}
+
+
+readiness = Readiness()
+
+
+def _warm_supabase():
+    from supabase_client import supabase
+
+    supabase.table("products").select("id").limit(1).execute()
+    return "connected"
+
+
+def _warm_replica():
+    from catalog_replica import get_replica
+
+    replica = get_replica()
+    if replica is None:
+        return None
+    return f"{replica.count()} products in {replica.path}"
+
+
+def _warm_catalog():
+    from helpers.shared_catalog import get_catalog
+
+    # Without the shared catalog, candidates are fetched per user (excluding
+    # what they've seen), so there is nothing to preload.
+    catalog = get_catalog()
+    if catalog is None:
+        return None
+    return f"shared generation {catalog.generation}, {len(catalog)} products"
+
+
+def _warm_neighbours():
+    from helpers.neighbours import get_neighbour_table
+
+    table = get_neighbour_table()
+    if table is None:
+        return None
+    return f"{table.ids.size} products"
+
+
+def _warm_gemini():
+    # Importing builds the SDK client and the rate limiter; no quota is spent.
+    from services.embedding_client import EMBEDDING_MODEL
+    from services.gemini_client import GEMINI_API_KEY
+
+    if not GEMINI_API_KEY:
+        return None
+    return EMBEDDING_MODEL
+
+
+def _warm_scoring():
+    """One throwaway scoring pass so BLAS threads and code paths are initialised."""
+    from helpers.algorithm import EMBED_DIM
+    from helpers.rerank import mmr_select, top_relevant
+
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((256, EMBED_DIM)).astype(np.float32)
+    query = rng.standard_normal(EMBED_DIM).astype(np.float32)
+    pool = top_relevant(matrix @ query)
+    mmr_select(query, matrix[pool])
+    return "ok"
+
+
+COMPONENTS = {
+    "supabase": _warm_supabase,
+    "replica": _warm_replica,
+    "catalog": _warm_catalog,
+    "neighbours": _warm_neighbours,
+    "gemini": _warm_gemini,
+    "scoring": _warm_scoring,
+}
+
+
+def _run_component(name: str, fn):
+    readiness.update(name, RUNNING)
+    started = time.perf_counter()
+    try:
+        detail = fn()
+    except Exception as exc:  # noqa: BLE001
+        print(f"[warmup] {name} failed: {exc!r}")
+        readiness.update(name, FAILED, error=str(exc), seconds=round(time.perf_counter() - started, 3))
+        return
+    status = SKIPPED if detail is None else READY
+    readiness.update(name, status, detail=detail, seconds=round(time.perf_counter() - started, 3))
+
+
+def _run():
+    for name, fn in COMPONENTS.items():
+        remaining = readiness.deadline - time.monotonic()
+        if remaining <= 0:
+            readiness.update(name, TIMED_OUT)
+            continue
+        worker = threading.Thread(target=_run_component, args=(name, fn), daemon=True)
+        worker.start()
+        worker.join(remaining)
+        if worker.is_alive():
+            # Leave it running; it may still finish and flip to ready.
+            readiness.update(name, TIMED_OUT, only_if=RUNNING)
+    print(f"[warmup] done: {readiness.snapshot()}")
+
+    # A failed component keeps the worker unready; keep trying until it works.
+    delay = RETRY_DELAY
+    while readiness.failed:
+        time.sleep(delay)
+        for name in readiness.failed:
+            print(f"[warmup] Retrying {name}")
+            _run_component(name, COMPONENTS[name])
+            if name not in readiness.failed:
+                print(f"[warmup] {name} recovered")
+        delay = min(delay * 2, MAX_RETRY_DELAY)
+
+
+def start_warmup(timeout: float = 30.0):
+    """Warm every component on a daemon thread; returns immediately."""
+    for name in COMPONENTS:
+        readiness.register(name)
+    readiness.deadline = time.monotonic() + timeout
+    threading.Thread(target=_run, name="warmup", daemon=True).start()
@@ -0,0 +1,287 @@
+"""
+Optional local SQLite replica of the ``products`` table.
+
+Set ``CATALOG_REPLICA_PATH`` to a file path and catalog reads (``db_service``
+lookups, the product list, search and recommendation candidates) are served
+from a local SQLite file instead of going over the network to Supabase.
+Writes still go to Supabase. The replica:
+
+* bulk-loads the table on first use, then syncs incrementally on the
+  ``(updated_at, id)`` high-water mark, which is persisted so a restart
+  resumes where it stopped;
+* on every sync, drops products whose ids are no longer in Supabase, so
+  deletes made anywhere (console, other hosts, scripts) reach it too;
+* applies this process's own dashboard writes immediately via the catalog
+  change feed;
+* stores embeddings as float32 BLOBs and keeps an FTS5 index for search.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+CATALOG_REPLICA_PATH = os.getenv("CATALOG_REPLICA_PATH", "")
+CATALOG_REPLICA_SYNC = float(os.getenv("CATALOG_REPLICA_SYNC", "30"))
+
+_COLUMNS = (
+    "id",
+    "external_id",
+    "name",
+    "description",
+    "price",
+    "category",
+    "image_url",
+    "tags",
+    "created_at",
+    "updated_at",
+    "embedding",
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    external_id TEXT,
+    name TEXT,
+    description TEXT,
+    price REAL,
+    category TEXT,
+    image_url TEXT,
+    tags TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    embedding BLOB
+);
+CREATE TABLE IF NOT EXISTS replica_meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name, description, category, tags, content='products', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts(rowid, name, description, category, tags)
+    VALUES (new.id, new.name, new.description, new.category, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts(products_fts, rowid, name, description, category, tags)
+    VALUES ('delete', old.id, old.name, old.description, old.category, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE ON products BEGIN
+    INSERT INTO products_fts(products_fts, rowid, name, description, category, tags)
+    VALUES ('delete', old.id, old.name, old.description, old.category, old.tags);
+    INSERT INTO products_fts(rowid, name, description, category, tags)
+    VALUES (new.id, new.name, new.description, new.category, new.tags);
+END;
+"""
+
+
+def _to_record(row: dict) -> dict:
+    """Replica column values for the columns present in ``row``."""
+    record = {column: row[column] for column in _COLUMNS if column in row}
+    record["id"] = int(row["id"])
+    if record.get("external_id") is not None:
+        record["external_id"] = str(record["external_id"])
+    if record.get("tags") is not None:
+        record["tags"] = json.dumps(record["tags"])
+    if "embedding" in record:
+        from helpers.algorithm import parse_embedding
+
+        emb = parse_embedding(record["embedding"])
+        record["embedding"] = None if emb is None else emb.astype(np.float32).tobytes()
+    return record
+
+
+def _from_record(record: sqlite3.Row, with_embedding: bool) -> dict:
+    row = dict(record)
+    if row.get("tags") is not None:
+        row["tags"] = json.loads(row["tags"])
+    if "embedding" in row:
+        blob = row.pop("embedding")
+        if with_embedding:
+            row["embedding"] = None if blob is None else np.frombuffer(blob, dtype=np.float32).tolist()
+    return row
+
+
+def _fts_query(text: str) -> str:
+    """Every word must match, as a prefix: 'red dre' -> "red"* "dre"*."""
+    words = [word.replace('"', '""') for word in text.split()]
+    return " ".join(f'"{word}"*' for word in words if word)
+
+
+class CatalogReplica:
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # -- writes (sync + change-feed consumer) ---------------------------------
+
+    def upsert_many(self, rows):
+        # Only the columns a row carries are written, so a partial feed row
+        # (e.g. from an update) doesn't blank the rest of the stored product.
+        groups: dict[tuple[str, ...], list[tuple]] = {}
+        for row in rows:
+            record = _to_record(row)
+            groups.setdefault(tuple(record), []).append(tuple(record.values()))
+
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                for columns, values in groups.items():
+                    placeholders = ", ".join("?" for _ in columns)
+                    updates = ", ".join(f"{c}=excluded.{c}" for c in columns if c != "id")
+                    conflict = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+                    conn.executemany(
+                        f"INSERT INTO products ({', '.join(columns)}) VALUES ({placeholders}) "
+                        f"ON CONFLICT(id) {conflict}",
+                        values,
+                    )
+
+    def upsert(self, row: dict):
+        self.upsert_many([row])
+
+    def delete(self, product_id: int):
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute("DELETE FROM products WHERE id = ?", (product_id,))
+
+    def get_meta(self, key: str) -> str | None:
+        found = self._conn().execute(
+            "SELECT value FROM replica_meta WHERE key = ?", (key,)
+        ).fetchone()
+        return None if found is None else found[0]
+
+    def set_meta(self, key: str, value: str):
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.execute(
+                    "INSERT INTO replica_meta (key, value) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (key, value),
+                )
+
+    # -- reads ----------------------------------------------------------------
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def ids(self) -> list[int]:
+        return [row[0] for row in self._conn().execute("SELECT id FROM products")]
+
+    def get(self, product_id: int, with_embedding: bool = True) -> dict | None:
+        found = self._conn().execute("SELECT * FROM products WHERE id = ?", (product_id,)).fetchone()
+        return None if found is None else _from_record(found, with_embedding)
+
+    def all(self, with_embedding: bool = False) -> list[dict]:
+        cursor = self._conn().execute("SELECT * FROM products ORDER BY id")
+        return [_from_record(record, with_embedding) for record in cursor]
+
+    def search(self, text: str) -> list[dict]:
+        query = _fts_query(text)
+        if not query:
+            return []
+        cursor = self._conn().execute(
+            "SELECT p.* FROM products_fts f JOIN products p ON p.id = f.rowid "
+            "WHERE products_fts MATCH ? ORDER BY f.rank",
+            (query,),
+        )
+        return [_from_record(record, False) for record in cursor]
+
+    def candidates(self, exclude_ids, limit: int) -> list[dict]:
+        exclude = list(exclude_ids)
+        # json_each keeps this one statement however many ids are excluded.
+        cursor = self._conn().execute(
+            "SELECT * FROM products WHERE embedding IS NOT NULL "
+            "AND id NOT IN (SELECT value FROM json_each(?)) ORDER BY id LIMIT ?",
+            (json.dumps(exclude), limit),
+        )
+        return [_from_record(record, True) for record in cursor]
+
+
+class _ReplicaSync:
+    """Keeps a replica current: bulk load once, then poll the high-water mark."""
+
+    def __init__(self, replica: CatalogReplica, interval: float, client=None):
+        from helpers.change_feed import ChangeFeed, HighWaterMarkPoller
+
+        self.replica = replica
+        feed = ChangeFeed()
+        feed.register(replica)
+        self.poller = HighWaterMarkPoller(feed, interval, client=client)
+        stored = replica.get_meta("high_water_mark")
+        if stored:
+            ts, last_id = json.loads(stored)
+            self.poller.high_water_mark = (ts, int(last_id))
+
+    def _save_mark(self):
+        if self.poller.high_water_mark is not None:
+            self.replica.set_meta("high_water_mark", json.dumps(self.poller.high_water_mark))
+
+    def initial_load(self):
+        from db_service import iter_all
+        from helpers.change_feed import FEED_COLUMNS
+
+        self.poller.seed()
+        batch = []
+        for row in iter_all("products", FEED_COLUMNS):
+            batch.append(row)
+            if len(batch) >= 500:
+                self.replica.upsert_many(batch)
+                batch = []
+        self.replica.upsert_many(batch)
+        self._save_mark()
+        print(f"[replica] Loaded {self.replica.count()} products into {self.replica.path}")
+
+    def sync_once(self) -> int:
+        # The mark only reports rows that still exist; deletes need the id list.
+        applied = self.poller.reconcile(self.replica.ids())
+        applied += self.poller.poll_once()
+        self._save_mark()
+        return applied
+
+    def _run(self):
+        while not self.poller._stop.wait(self.poller.interval):
+            self.sync_once()
+
+    def start(self):
+        if self.poller.high_water_mark is None and self.replica.count() == 0:
+            self.initial_load()
+        else:
+            self.sync_once()
+        threading.Thread(target=self._run, name="catalog-replica-sync", daemon=True).start()
+
+
+_replica: CatalogReplica | None = None
+_replica_lock = threading.Lock()
+
+
+def get_replica() -> CatalogReplica | None:
+    """The process-wide replica, or None when CATALOG_REPLICA_PATH is unset."""
+    global _replica
+    if not CATALOG_REPLICA_PATH:
+        return None
+    if _replica is not None:
+        return _replica
+    with _replica_lock:
+        if _replica is None:
+            from helpers.change_feed import catalog_feed
+
+            replica = CatalogReplica(CATALOG_REPLICA_PATH)
+            _ReplicaSync(replica, CATALOG_REPLICA_SYNC).start()
+            catalog_feed.register(replica)
+            _replica = replica
+    return _replica
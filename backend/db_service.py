@@ -1,12 +1,25 @@
 from supabase_client import supabase
 
+def _replica_for(table_name):
+    """The local read replica serving this table, if one is enabled."""
+    if table_name != 'products':
+        return None
+    from catalog_replica import get_replica
+    return get_replica()
+
 def get_all(table_name):
     """Get all records from a table."""
+    replica = _replica_for(table_name)
+    if replica is not None:
+        return replica.all(with_embedding=True)
     response = supabase.table(table_name).select('*').execute()
     return response.data
 
 def get_by_id(table_name, record_id):
     """Get a single record by ID."""
+    replica = _replica_for(table_name)
+    if replica is not None:
+        return replica.get(record_id)
     response = supabase.table(table_name).select('*').eq('id', record_id).execute()
     return response.data[0] if response.data else None
 
@@ -15,6 +28,13 @@ def create_record(table_name, data):
     response = supabase.table(table_name).insert(data).execute()
     return response.data[0] if response.data else None
 
+def create_records(table_name, rows):
+    """Create many records in a single insert."""
+    if not rows:
+        return []
+    response = supabase.table(table_name).insert(rows).execute()
+    return response.data or []
+
 def update_record(table_name, record_id, updates):
     """Update an existing record by ID."""
     response = supabase.table(table_name).update(updates).eq('id', record_id).execute()
@@ -23,4 +43,35 @@ def update_record(table_name, record_id, updates):
 def delete_record(table_name, record_id):
     """Delete a record by ID."""
     response = supabase.table(table_name).delete().eq('id', record_id).execute()
-    return response.data[0] if response.data else None
\ No newline at end of file
+    return response.data[0] if response.data else None
+
+def _after(orders, row):
+    """PostgREST filter for rows that sort after `row` on the `orders` columns."""
+    clauses = []
+    for i, column in enumerate(orders):
+        terms = [f'{c}.eq."{row[c]}"' for c in orders[:i]] + [f'{column}.gt."{row[column]}"']
+        clauses.append(terms[0] if len(terms) == 1 else f"and({','.join(terms)})")
+    return ','.join(clauses)
+
+def iter_all(table_name, columns='*', page_size=1000, order='id'):
+    """Yield every record in a table, one page at a time.
+
+    `order` is a column name or a tuple of column names that together identify
+    a row, and `columns` must include them. Each page starts after the last
+    row read rather than at an offset, so rows deleted while paging don't
+    shift later pages and cause rows to be skipped.
+    """
+    orders = (order,) if isinstance(order, str) else tuple(order)
+    last = None
+    while True:
+        query = supabase.table(table_name).select(columns)
+        if last is not None:
+            query = query.or_(_after(orders, last))
+        for column in orders:
+            query = query.order(column)
+        response = query.limit(page_size).execute()
+        rows = response.data or []
+        yield from rows
+        if len(rows) < page_size:
+            return
+        last = rows[-1]
@@ -1,6 +1,11 @@
 import numpy as np
 from supabase_client import supabase
 from postgrest.exceptions import APIError
+from helpers.shared_catalog import get_catalog
+from helpers.single_flight import query_key, supabase_flight
+from catalog_replica import get_replica
+from helpers.rerank import mmr_select, top_relevant
+from helpers.user_state import UserState, user_states
 
 EMBED_DIM = 768  # set this to match your actual embedding dimension
 
@@ -68,14 +73,22 @@ def get_candidate_products(exclude_ids: list[int], limit: int = 500) -> list[dic
     For simplicity we just take up to `limit` items.
     You can add filters (e.g. category, price) here later.
     """
-    query = supabase.table("products").select(
-        "id, name, price, image_url, embedding, category, description"
-    )
-    if exclude_ids:
-        # Supabase 'not in' filter
-        query = query.not_.in_("id", list(exclude_ids))
-    res = query.limit(limit).execute()
-    return res.data or []
+    replica = get_replica()
+    if replica is not None:
+        return replica.candidates(exclude_ids, limit)
+
+    columns = "id, name, price, image_url, embedding, category, description"
+    exclude = tuple(sorted(exclude_ids))
+
+    def fetch():
+        query = supabase.table("products").select(columns)
+        if exclude:
+            # Supabase 'not in' filter
+            query = query.not_.in_("id", list(exclude))
+        return query.limit(limit).execute().data or []
+
+    key = query_key("products", columns, ("not_in", exclude), ("limit", limit))
+    return supabase_flight.do(key, fetch)
 
 
 def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
@@ -88,7 +101,89 @@ def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
     return float(np.dot(a, b) / denom)
 
 
-seen = {}
+def _rank_batch(
+    state: UserState,
+    user_embedding: np.ndarray,
+    vectors: np.ndarray,
+    relevance: np.ndarray,
+    categories=None,
+) -> list[int]:
+    """MMR-select a batch among the most relevant rows of ``vectors``."""
+    pool = top_relevant(relevance)
+    if pool.size == 0:
+        return []
+    picked = mmr_select(
+        user_embedding,
+        vectors[pool],
+        categories=None if categories is None else [categories[i] for i in pool],
+        recent=np.array(state.recent) if state.recent else None,
+    )
+    return [int(pool[i]) for i in picked]
+
+
+def _batch_from_catalog(
+    catalog, state: UserState, user_embedding: np.ndarray | None
+) -> list[tuple[dict, np.ndarray]]:
+    """Rank the next batch from the shared catalog with vectorized passes."""
+    if len(catalog) == 0:
+        return []
+    mask = ~np.isin(catalog.ids, np.fromiter(state.seen, dtype=np.int64))
+    if not mask.any():
+        return []
+
+    if user_embedding is None or user_embedding.shape[0] != catalog.dim:
+        index = int(np.argmax(mask))
+        return [(catalog.metadata(index), catalog.matrix[index])]
+
+    user_norm = np.linalg.norm(user_embedding)
+    denom = catalog.norms * user_norm
+    scores = catalog.matrix @ user_embedding.astype(np.float32)
+    scores = np.divide(scores, denom, out=np.zeros_like(scores), where=denom > 0)
+    scores[~mask] = -np.inf
+
+    # Only the relevance pool needs metadata (for category quotas).
+    pool = top_relevant(scores)
+    metas = {int(i): catalog.metadata(int(i)) for i in pool}
+    picked = _rank_batch(
+        state,
+        user_embedding,
+        catalog.matrix[pool],
+        scores[pool],
+        [metas[int(i)].get("category") for i in pool],
+    )
+    return [(metas[int(pool[i])], catalog.matrix[pool[i]]) for i in picked]
+
+
+def _batch_from_candidates(
+    candidates: list[dict], state: UserState, user_embedding: np.ndarray
+) -> list[tuple[dict, np.ndarray]]:
+    """Rank the next batch from candidates fetched from Supabase."""
+    products, vectors = [], []
+    for product in candidates:
+        emb = parse_embedding(product.get("embedding"))
+        # skip products without an embedding or with the wrong dimension
+        if emb is None or emb.shape != (EMBED_DIM,) or product["id"] in state.seen:
+            continue
+        products.append(product)
+        vectors.append(emb)
+    if not products:
+        return []
+
+    matrix = np.vstack(vectors)
+    denom = np.linalg.norm(matrix, axis=1) * np.linalg.norm(user_embedding)
+    relevance = np.divide(
+        matrix @ user_embedding, denom, out=np.zeros(len(products)), where=denom > 0
+    )
+    categories = [product.get("category") for product in products]
+    picked = _rank_batch(state, user_embedding, matrix, relevance, categories)
+    return [(products[i], matrix[i]) for i in picked]
+
+
+def _serve(state: UserState, product: dict, vector: np.ndarray | None) -> dict:
+    state.seen.add(product["id"])
+    if vector is not None:
+        state.recent.append(np.asarray(vector, dtype=np.float32))
+    return product
 
 
 def get_next_best_product(user_id: int) -> dict | None:
@@ -99,52 +194,51 @@ def get_next_best_product(user_id: int) -> dict | None:
     Strategy:
     - If the user has a profile embedding:
       * fetch unseen products
-      * compute cosine similarity to each product embedding in Python
-      * return the highest-similarity product
+      * score every candidate against the profile in one vectorized pass
+      * re-rank the most relevant ones with MMR into a small batch of
+        relevant-but-different products, served one per call until the
+        user swipes (a swipe re-ranks against the updated profile)
     - If no profile (cold start):
       * just return a random/popular unseen product
+    - With CATALOG_SHARED=1 both cases are served from the shared catalog
+      matrix instead of fetching candidates from Supabase.
     """
-    user_embedding = get_user_profile_embedding(user_id)
+    state = user_states.get(user_id)
+    # Per-user lock: other users carry on; this user's requests take turns.
+    with state.lock:
+        return _next_for_state(user_id, state)
 
-    # Get candidates (unseen products)
-    candidates = get_candidate_products(exclude_ids=seen.keys(), limit=500)  # type: ignore
-
-    if not candidates:
-        return None  # no products left to show
-
-    # Cold start: if no user embedding, return first candidate with an embedding
-    if user_embedding is None:
-        for product in candidates:
-            emb_list = parse_embedding(product.get("embedding"))
-            if emb_list is not None and emb_list.size > 0:
-                seen[product["id"]] = True
-                return product
-        # If no products have embeddings, just return the first one
-        if candidates:
-            seen[candidates[0]["id"]] = True
-            return candidates[0]
-        return None
 
-    # Compute similarity for each candidate and pick the best
-    best_product = None
-    best_score = -1.0
+def _next_for_state(user_id: int, state: UserState) -> dict | None:
+    while state.pending:
+        product, vector = state.pending.pop(0)
+        if product["id"] not in state.seen:
+            return _serve(state, product, vector)
 
-    for product in candidates:
-        emb_list = parse_embedding(product.get("embedding"))
-        if emb_list is None or emb_list.size == 0:
-            # skip products without an embedding
-            continue
-        p_emb = emb_list
-        if p_emb.shape[0] != EMBED_DIM:
-            # skip if dimension doesn’t match
-            continue
+    user_embedding = get_user_profile_embedding(user_id)
+
+    catalog = get_catalog()
+    if catalog is not None:
+        batch = _batch_from_catalog(catalog, state, user_embedding)
+    else:
+        # Get candidates (unseen products)
+        candidates = get_candidate_products(exclude_ids=list(state.seen), limit=500)
 
-        score = cosine_similarity(user_embedding, p_emb)  # type: ignore
-        if score > best_score and seen.get(product["id"], False) is False:
-            best_score = score
-            best_product = product
+        if not candidates:
+            return None  # no products left to show
 
-    if best_product:
-        seen[best_product["id"]] = True
+        # Cold start: if no user embedding, return first candidate with an embedding
+        if user_embedding is None:
+            for product in candidates:
+                emb_list = parse_embedding(product.get("embedding"))
+                if emb_list is not None and emb_list.size > 0:
+                    return _serve(state, product, emb_list)
+            # If no products have embeddings, just return the first one
+            return _serve(state, candidates[0], None)
 
-    return best_product
+        batch = _batch_from_candidates(candidates, state, user_embedding)
+
+    if not batch:
+        return None
+    state.pending = batch[1:]
+    return _serve(state, *batch[0])
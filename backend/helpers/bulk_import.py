@@ -0,0 +1,204 @@
+"""
+Streaming bulk import of products for the dashboard.
+
+Rows are parsed one at a time straight off the request stream (JSONL or CSV),
+validated, then embedded and inserted in batches so a large upload never has
+to sit in memory and costs one Gemini call and one insert per batch instead
+of per product.
+"""
+
+import csv
+import io
+import json
+import re
+import time
+
+from db_service import create_records
+from helpers.change_feed import catalog_feed
+from services.embedding_client import embed_products
+
+IMPORT_BATCH_SIZE = 100
+PRODUCT_FIELDS = ("external_id", "name", "description", "price", "category", "image_url", "tags")
+
+
+class RowError(ValueError):
+    """Raised when an uploaded row can't be turned into a product."""
+
+
+def _decoded_lines(stream, bad_lines: set[int]):
+    """Yield each line of a binary stream as text.
+
+    Lines are decoded one at a time so an invalid byte only spoils its own
+    line: it is replaced, and its 1-based number is added to ``bad_lines``.
+    """
+    for number, raw in enumerate(io.BufferedReader(stream), start=1):
+        try:
+            yield raw.decode("utf-8")
+        except UnicodeDecodeError:
+            bad_lines.add(number)
+            yield raw.decode("utf-8", errors="replace")
+
+
+def _iter_csv(stream):
+    bad_lines: set[int] = set()
+    reader = csv.DictReader(_decoded_lines(stream, bad_lines))
+    number = 0
+    while True:
+        first_line = reader.line_num + 1
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            if reader.line_num < first_line:
+                raise  # Nothing was consumed; the reader can't move past it.
+            number += 1
+            yield number, RowError(f"Invalid CSV: {exc}")
+            continue
+        number += 1
+        # A quoted field can span lines; the row owns all the lines it read.
+        if any(line in bad_lines for line in range(first_line, reader.line_num + 1)):
+            yield number, RowError("Row is not valid UTF-8")
+            continue
+        yield number, row
+
+
+def iter_rows(stream, fmt: str):
+    """Yield ``(row_number, raw_row)`` pairs from a binary stream.
+
+    ``raw_row`` is a dict, or a RowError for rows that could not be decoded
+    or parsed, so one bad line doesn't abort the rest of the upload.
+    """
+    if fmt == "csv":
+        yield from _iter_csv(stream)
+        return
+
+    bad_lines: set[int] = set()
+    for number, line in enumerate(_decoded_lines(stream, bad_lines), start=1):
+        if number in bad_lines:
+            yield number, RowError("Line is not valid UTF-8")
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield number, RowError(f"Invalid JSON: {exc.msg}")
+            continue
+        if not isinstance(row, dict):
+            yield number, RowError("Each line must be a JSON object")
+            continue
+        yield number, row
+
+
+def _parse_tags(value) -> list[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, list):
+        return [str(tag).strip() for tag in value if str(tag).strip()]
+    value = str(value).strip()
+    if value.startswith("["):
+        try:
+            return _parse_tags(json.loads(value))
+        except json.JSONDecodeError as exc:
+            raise RowError(f"Invalid tags: {exc.msg}") from exc
+    return [tag.strip() for tag in re.split(r"[|;,]", value) if tag.strip()]
+
+
+def validate_row(raw: dict) -> dict:
+    """Normalise an uploaded row into a ``products`` insert payload."""
+    product = {}
+    for field in PRODUCT_FIELDS:
+        value = raw.get(field)
+        if isinstance(value, str):
+            value = value.strip()
+        if value not in (None, ""):
+            product[field] = value
+
+    if not product.get("name"):
+        raise RowError("'name' is required")
+
+    if "price" in product:
+        try:
+            product["price"] = float(product["price"])
+        except (TypeError, ValueError) as exc:
+            raise RowError(f"Invalid price: {product['price']!r}") from exc
+        if product["price"] < 0:
+            raise RowError("'price' must not be negative")
+
+    product["tags"] = _parse_tags(product.get("tags"))
+    return product
+
+
+def _flush(batch: list[tuple[int, dict]], results: list[dict]) -> int:
+    """Embed and insert one batch. Returns how many rows were inserted."""
+    products = [product for _, product in batch]
+    try:
+        for product, embedding in zip(products, embed_products(products)):
+            product["embedding"] = embedding
+        records = create_records("products", products)
+    except Exception as exc:  # noqa: BLE001
+        for number, _ in batch:
+            results.append({"row": number, "status": "error", "error": str(exc)})
+        return 0
+
+    for i, (number, _) in enumerate(batch):
+        record = records[i] if i < len(records) else None
+        results.append({"row": number, "status": "inserted", "id": record and record.get("id")})
+        catalog_feed.emit_upsert(record)
+    return len(batch)
+
+
+def import_products(rows, batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    """Validate, embed and insert ``(row_number, raw_row)`` pairs in batches.
+
+    Undecodable or malformed rows fail on their own. A CSV error the reader
+    can't get past ends the upload, but batches already inserted stay in the
+    report and the error is recorded as a failed row.
+    """
+    started = time.perf_counter()
+    results: list[dict] = []
+    batch: list[tuple[int, dict]] = []
+    total = inserted = number = 0
+    aborted = None
+    rows = iter(rows)
+
+    while True:
+        try:
+            number, raw = next(rows)
+        except StopIteration:
+            break
+        except csv.Error as exc:
+            aborted = f"Invalid CSV: {exc}"
+            total += 1
+            results.append({"row": number + 1, "status": "error", "error": f"Upload stopped: {aborted}"})
+            break
+        total += 1
+        try:
+            if isinstance(raw, RowError):
+                raise raw
+            batch.append((number, validate_row(raw)))
+        except RowError as exc:
+            results.append({"row": number, "status": "error", "error": str(exc)})
+            continue
+        if len(batch) >= batch_size:
+            inserted += _flush(batch, results)
+            batch = []
+
+    if batch:
+        inserted += _flush(batch, results)
+
+    results.sort(key=lambda result: result["row"])
+    elapsed = time.perf_counter() - started
+    return {
+        "results": results,
+        "summary": {
+            "rows": total,
+            "inserted": inserted,
+            "failed": total - inserted,
+            "aborted": aborted,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(inserted / elapsed, 1) if elapsed > 0 else None,
+        },
+    }
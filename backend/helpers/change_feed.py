@@ -0,0 +1,269 @@
+"""
+Incremental change feed for the ``products`` table.
+
+In-memory consumers (the shared catalog loader, indexes, caches) register with
+``catalog_feed`` and receive each insert, update and delete as it happens,
+instead of rescanning the whole table. Changes arrive from three sources:
+
+* the dashboard routes, which emit their own writes straight away;
+* a poller that pages through ``products`` past an ``(updated_at, id)``
+  high-water mark (needs an ``updated_at`` column maintained by a trigger);
+* optionally the Supabase realtime channel, which also reports deletes made
+  outside this app.
+
+Nothing is started by default; see ``start_catalog_feed``.
+"""
+
+import asyncio
+import os
+import threading
+
+from postgrest.exceptions import APIError
+
+from helpers.shared_catalog import META_FIELDS
+
+# Poll interval in seconds; 0 disables the poller.
+FEED_POLL_INTERVAL = float(os.getenv("CATALOG_FEED_POLL", "0"))
+FEED_REALTIME = os.getenv("CATALOG_FEED_REALTIME", "0") == "1"
+FEED_PAGE_SIZE = 500
+FEED_COLUMNS = ", ".join(META_FIELDS + ("embedding", "created_at", "updated_at"))
+
+
+class ChangeFeed:
+    """Fan out product changes to registered consumers.
+
+    A consumer is any object with ``upsert(row: dict)`` and
+    ``delete(product_id: int)`` methods. Emitting is synchronous, so a test
+    can call ``emit_upsert`` / ``emit_delete`` and assert on the consumer; the
+    sources below take their client as a parameter so they can run against a
+    local stand-in too.
+    """
+
+    def __init__(self):
+        self._consumers = []
+        self._lock = threading.Lock()
+
+    def register(self, consumer):
+        with self._lock:
+            if consumer not in self._consumers:
+                self._consumers.append(consumer)
+        return consumer
+
+    def unregister(self, consumer):
+        with self._lock:
+            if consumer in self._consumers:
+                self._consumers.remove(consumer)
+
+    def emit_upsert(self, row: dict | None):
+        if not row or row.get("id") is None:
+            return
+        self._dispatch("upsert", row)
+
+    def emit_delete(self, product_id: int | None):
+        if product_id is None:
+            return
+        self._dispatch("delete", int(product_id))
+
+    def _dispatch(self, method: str, arg):
+        with self._lock:
+            consumers = list(self._consumers)
+        for consumer in consumers:
+            try:
+                getattr(consumer, method)(arg)
+            except Exception as exc:  # noqa: BLE001
+                # One broken consumer must not stop the others from updating.
+                print(f"[feed] {type(consumer).__name__}.{method} failed: {exc!r}")
+
+
+catalog_feed = ChangeFeed()
+
+
+def _default_client():
+    from supabase_client import supabase
+
+    return supabase
+
+
+class HighWaterMarkPoller:
+    """Page through products changed since the last ``(updated_at, id)`` seen.
+
+    ``client`` is anything with the supabase-py ``table()`` query builder;
+    it defaults to the app's Supabase client.
+    """
+
+    def __init__(
+        self,
+        feed: ChangeFeed,
+        interval: float,
+        page_size: int = FEED_PAGE_SIZE,
+        client=None,
+    ):
+        self.feed = feed
+        self.interval = interval
+        self.page_size = page_size
+        self.client = client
+        self.high_water_mark: tuple[str, int] | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _table(self):
+        client = self.client if self.client is not None else _default_client()
+        return client.table("products")
+
+    def _query(self):
+        query = self._table().select(FEED_COLUMNS)
+        if self.high_water_mark is not None:
+            ts, last_id = self.high_water_mark
+            query = query.or_(
+                f'updated_at.gt."{ts}",and(updated_at.eq."{ts}",id.gt.{last_id})'
+            )
+        return query.order("updated_at").order("id")
+
+    def seed(self):
+        """Start from the newest existing row so only later changes are replayed."""
+        res = (
+            self._table()
+            .select("id, updated_at")
+            .order("updated_at", desc=True)
+            .order("id", desc=True)
+            .limit(1)
+            .execute()
+        )
+        if res.data:
+            row = res.data[0]
+            self.high_water_mark = (row["updated_at"], int(row["id"]))
+
+    def poll_once(self) -> int:
+        """Apply every pending change. Returns the number of rows applied."""
+        applied = 0
+        while True:
+            try:
+                rows = self._query().limit(self.page_size).execute().data or []
+            except APIError as exc:
+                print(f"[feed] Poll failed: {exc!r}")
+                return applied
+            for row in rows:
+                self.feed.emit_upsert(row)
+                if row.get("updated_at") is not None:
+                    self.high_water_mark = (row["updated_at"], int(row["id"]))
+            applied += len(rows)
+            if len(rows) < self.page_size:
+                return applied
+
+    def live_ids(self) -> set[int] | None:
+        """Every product id currently in the table, or None if the read failed."""
+        ids: set[int] = set()
+        last_id = None
+        while True:
+            query = self._table().select("id")
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            try:
+                rows = query.order("id").limit(self.page_size).execute().data or []
+            except APIError as exc:
+                print(f"[feed] Listing product ids failed: {exc!r}")
+                return None
+            ids.update(int(row["id"]) for row in rows)
+            if len(rows) < self.page_size:
+                return ids
+            last_id = int(rows[-1]["id"])
+
+    def reconcile(self, known_ids) -> int:
+        """Emit a delete for each of ``known_ids`` no longer in the table.
+
+        The high-water mark only ever reports rows that still exist, so a
+        consumer without the realtime channel calls this to notice deletes
+        made elsewhere. Returns the number of deletes emitted.
+        """
+        known = set(known_ids)
+        live = self.live_ids()
+        if live is None:
+            return 0
+        gone = known - live
+        for product_id in sorted(gone):
+            self.feed.emit_delete(product_id)
+        return len(gone)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll_once()
+
+    def start(self, backfill: bool = False):
+        if self._thread is not None:
+            return
+        if not backfill and self.high_water_mark is None:
+            self.seed()
+        self._thread = threading.Thread(target=self._run, name="catalog-feed-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+class RealtimeSource:
+    """Forward Supabase realtime ``products`` events into the feed.
+
+    supabase-py only implements realtime on the async client, so this runs
+    its own event loop on a daemon thread. ``client_factory`` is an async
+    callable returning that client; by default it connects to the app's
+    Supabase project.
+    """
+
+    def __init__(self, feed: ChangeFeed, client_factory=None):
+        self.feed = feed
+        self.client_factory = client_factory
+        self._thread: threading.Thread | None = None
+
+    def _on_change(self, payload):
+        data = payload.get("data", {})
+        event = str(data.get("type", "")).upper()
+        if event.endswith("DELETE"):
+            self.feed.emit_delete((data.get("old_record") or {}).get("id"))
+        else:
+            self.feed.emit_upsert(data.get("record"))
+
+    async def _connect(self):
+        if self.client_factory is not None:
+            return await self.client_factory()
+        from supabase import acreate_client
+        from supabase_client import SUPABASE_URL, SUPABASE_KEY
+
+        return await acreate_client(SUPABASE_URL, SUPABASE_KEY)
+
+    async def _listen(self, stop: asyncio.Event | None = None):
+        client = await self._connect()
+        channel = client.channel("catalog-feed")
+        channel.on_postgres_changes(
+            "*", schema="public", table="products", callback=self._on_change
+        )
+        await channel.subscribe()
+        await (stop or asyncio.Event()).wait()
+
+    def _run(self):
+        try:
+            asyncio.run(self._listen())
+        except Exception as exc:  # noqa: BLE001
+            print(f"[feed] Realtime channel stopped: {exc!r}")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="catalog-feed-realtime", daemon=True)
+            self._thread.start()
+
+
+_poller: HighWaterMarkPoller | None = None
+_realtime: RealtimeSource | None = None
+
+
+def start_catalog_feed(
+    poll_interval: float = FEED_POLL_INTERVAL, realtime: bool = FEED_REALTIME
+):
+    """Start the configured background sources for ``catalog_feed`` (idempotent)."""
+    global _poller, _realtime
+    if poll_interval > 0 and _poller is None:
+        _poller = HighWaterMarkPoller(catalog_feed, poll_interval)
+        _poller.start()
+    if realtime and _realtime is None:
+        _realtime = RealtimeSource(catalog_feed)
+        _realtime.start()
+    return catalog_feed
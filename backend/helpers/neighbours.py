@@ -0,0 +1,340 @@
+"""
+Precomputed item-to-item neighbours ("more like this").
+
+``compute_neighbours`` finds the top-N most similar products for every product
+with blocked matrix multiplication, so only a ``block x N`` slice of the
+similarity matrix exists at any time. The result is a compact table (neighbour
+ids + float32 scores per product) that answers lookups in O(1) and is kept up
+to date incrementally through the catalog change feed.
+
+Build or rebuild the table offline from the backend directory:
+
+    python -m helpers.neighbours
+
+The saved file records the ``(updated_at, id)`` high-water mark it is current
+to. A single process loads it with its vectors, replays the changes made since
+that mark and then follows the change feed. With ``CATALOG_SHARED=1`` the
+catalog loader (``python -m helpers.shared_catalog --follow``) does that and
+re-saves the file, and workers map only the neighbour lists, reloading them
+when the file changes, so no worker holds its own copy of the vectors.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from helpers.shared_catalog import CATALOG_SHARED, CHECK_INTERVAL, META_FIELDS
+
+NEIGHBOURS_K = int(os.getenv("NEIGHBOURS_K", "20"))
+NEIGHBOURS_PATH = os.getenv("NEIGHBOURS_PATH") or os.path.join(
+    tempfile.gettempdir(), "trendswipe-neighbours.npz"
+)
+BLOCK_SIZE = 1024
+
+
+def normalise(matrix: np.ndarray) -> np.ndarray:
+    """Unit-length float32 rows; all-zero rows stay zero."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _top_k(sims: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Column indices and scores of the k largest values per row, best first."""
+    k = min(k, sims.shape[1])
+    if k == 0:
+        empty = np.empty((sims.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+    part = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(sims, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+def compute_neighbours(
+    unit: np.ndarray,
+    k: int = NEIGHBOURS_K,
+    block_size: int = BLOCK_SIZE,
+    rows=None,
+    valid: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Top-k neighbour row indices and cosine scores for ``rows`` (default: all).
+
+    ``unit`` must be row-normalised; ``valid`` masks out rows that may not be
+    anyone's neighbour. Self-matches are excluded and missing slots (fewer than
+    k candidates) are padded with index -1 / score -inf.
+    """
+    rows = np.arange(unit.shape[0]) if rows is None else np.asarray(rows, dtype=np.int64)
+    indices = np.full((rows.size, k), -1, dtype=np.int64)
+    scores = np.full((rows.size, k), -np.inf, dtype=np.float32)
+
+    for start in range(0, rows.size, block_size):
+        block = rows[start : start + block_size]
+        sims = unit[block] @ unit.T
+        sims[np.arange(block.size), block] = -np.inf
+        if valid is not None:
+            sims[:, ~valid] = -np.inf
+        top, top_scores = _top_k(sims, k)
+        top[np.isneginf(top_scores)] = -1
+        indices[start : start + block.size, : top.shape[1]] = top
+        scores[start : start + block.size, : top.shape[1]] = top_scores
+    return indices, scores
+
+
+class NeighbourTable:
+    """Neighbour ids and scores per product, plus what's needed to update them.
+
+    Also a catalog change-feed consumer: ``upsert`` and ``delete`` patch the
+    affected rows instead of rebuilding the whole table. A table loaded
+    without its vectors (``unit`` is None) only answers lookups.
+    """
+
+    def __init__(
+        self,
+        ids,
+        unit,
+        metas,
+        neighbour_ids,
+        scores,
+        k: int = NEIGHBOURS_K,
+        high_water_mark: tuple[str, int] | None = None,
+    ):
+        self.k = k
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.unit = None if unit is None else np.asarray(unit, dtype=np.float32)
+        self.high_water_mark = high_water_mark
+        # Changed since the last save.
+        self.dirty = False
+        self.metas = list(metas)
+        self.neighbour_ids = np.asarray(neighbour_ids, dtype=np.int64)
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self.alive = np.ones(self.ids.size, dtype=bool)
+        self.row_of = {int(pid): i for i, pid in enumerate(self.ids)}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def build(cls, rows, k: int = NEIGHBOURS_K, high_water_mark=None) -> "NeighbourTable":
+        from helpers.shared_catalog import build_catalog
+
+        ids, matrix, metas = build_catalog(rows)
+        unit = normalise(matrix)
+        indices, scores = compute_neighbours(unit, k)
+        neighbour_ids = np.where(indices >= 0, ids[np.maximum(indices, 0)], -1)
+        return cls(ids, unit, metas, neighbour_ids, scores, k, high_water_mark)
+
+    def similar(self, product_id: int, limit: int | None = None) -> list[dict] | None:
+        """Neighbours of ``product_id`` as display dicts with a ``score``, or None."""
+        with self._lock:
+            row = self.row_of.get(product_id)
+            if row is None or not self.alive[row]:
+                return None
+            result = []
+            for pid, score in zip(self.neighbour_ids[row], self.scores[row]):
+                if pid < 0:
+                    break
+                meta = self.metas[self.row_of[int(pid)]]
+                result.append({**meta, "score": round(float(score), 4)})
+                if limit and len(result) >= limit:
+                    break
+            return result
+
+    def _recompute_rows(self, rows: np.ndarray):
+        if rows.size == 0:
+            return
+        indices, scores = compute_neighbours(self.unit, self.k, rows=rows, valid=self.alive)
+        self.scores[rows] = scores
+        self.neighbour_ids[rows] = np.where(indices >= 0, self.ids[np.maximum(indices, 0)], -1)
+
+    def upsert(self, row: dict):
+        from helpers.algorithm import parse_embedding
+
+        emb = parse_embedding(row.get("embedding"))
+        if emb is None or emb.ndim != 1 or (self.unit.size and emb.size != self.unit.shape[1]):
+            return
+        product_id = int(row["id"])
+        vector = normalise(emb[None, :])[0]
+
+        with self._lock:
+            index = self.row_of.get(product_id)
+            if index is None:
+                index = self.ids.size
+                self.row_of[product_id] = index
+                self.ids = np.append(self.ids, product_id)
+                self.unit = vector[None, :] if self.unit.size == 0 else np.vstack([self.unit, vector])
+                self.metas.append({})
+                self.alive = np.append(self.alive, True)
+                self.neighbour_ids = np.vstack(
+                    [self.neighbour_ids.reshape(-1, self.k), np.full((1, self.k), -1, dtype=np.int64)]
+                )
+                self.scores = np.vstack(
+                    [self.scores.reshape(-1, self.k), np.full((1, self.k), -np.inf, dtype=np.float32)]
+                )
+            else:
+                self.unit[index] = vector
+            self.alive[index] = True
+            self.dirty = True
+            meta = {field: row[field] for field in META_FIELDS if field in row}
+            self.metas[index] = {**self.metas[index], **meta}
+
+            sims = self.unit @ vector
+            sims[index] = -np.inf
+            # Rows that listed this product may now rank it lower: recompute those.
+            stale = np.flatnonzero((self.neighbour_ids == product_id).any(axis=1))
+            # Rows that didn't list it but should now: it beats their weakest neighbour.
+            better = np.flatnonzero(self.alive & (sims > self.scores[:, -1]))
+            self._recompute_rows(np.union1d(np.union1d(stale, better), [index]))
+
+    def delete(self, product_id: int):
+        with self._lock:
+            index = self.row_of.get(product_id)
+            if index is None or not self.alive[index]:
+                return
+            self.alive[index] = False
+            self.dirty = True
+            self.unit[index] = 0
+            self.neighbour_ids[index] = -1
+            self.scores[index] = -np.inf
+            stale = np.flatnonzero((self.neighbour_ids == product_id).any(axis=1))
+            self._recompute_rows(stale)
+
+    def save(self, path: str = NEIGHBOURS_PATH):
+        with self._lock:
+            keep = self.alive
+            tmp_path = f"{path}.tmp.npz"
+            np.savez(
+                tmp_path,
+                ids=self.ids[keep],
+                unit=self.unit[keep],
+                neighbour_ids=self.neighbour_ids[keep],
+                scores=self.scores[keep],
+                metas=np.array(json.dumps([m for m, a in zip(self.metas, keep) if a])),
+                high_water_mark=np.array(json.dumps(self.high_water_mark)),
+            )
+            self.dirty = False
+        os.replace(tmp_path, path)
+
+    def save_if_dirty(self, high_water_mark, path: str = NEIGHBOURS_PATH) -> bool:
+        """Save with ``high_water_mark`` if anything changed since the last save."""
+        if not self.dirty:
+            return False
+        self.high_water_mark = high_water_mark
+        self.save(path)
+        return True
+
+    @classmethod
+    def load(cls, path: str = NEIGHBOURS_PATH, with_vectors: bool = True) -> "NeighbourTable":
+        # npz members are read lazily, so skipping "unit" never reads the vectors.
+        with np.load(path) as data:
+            mark = json.loads(str(data["high_water_mark"])) if "high_water_mark" in data.files else None
+            return cls(
+                data["ids"],
+                data["unit"] if with_vectors else None,
+                json.loads(str(data["metas"])),
+                data["neighbour_ids"],
+                data["scores"],
+                k=data["neighbour_ids"].shape[1],
+                high_water_mark=None if mark is None else (mark[0], int(mark[1])),
+            )
+
+
+def catch_up(table: NeighbourTable, client=None) -> int:
+    """Apply product changes made since the table's high-water mark.
+
+    Edits and inserts are replayed from the ``(updated_at, id)`` mark; deletes
+    are found by comparing the table's ids with those still in ``products``.
+    Returns the number of changes applied.
+    """
+    from helpers.change_feed import ChangeFeed, HighWaterMarkPoller
+
+    feed = ChangeFeed()
+    feed.register(table)
+    poller = HighWaterMarkPoller(feed, interval=0, client=client)
+    if table.high_water_mark is None:
+        # Saved before marks were recorded: there is no point to replay from.
+        print("[neighbours] Table has no high-water mark; rebuild it to pick up older changes")
+        poller.seed()
+    else:
+        poller.high_water_mark = table.high_water_mark
+    with table._lock:
+        known = table.ids[table.alive].tolist()
+    changes = poller.reconcile(known) + poller.poll_once()
+    table.high_water_mark = poller.high_water_mark
+    return changes
+
+
+_table: NeighbourTable | None = None
+_table_lock = threading.Lock()
+_table_version: int | None = None
+_last_check = 0.0
+
+
+def _shared_table() -> NeighbourTable | None:
+    """Neighbour lists only, reloaded when the catalog loader re-saves them."""
+    global _table, _table_version, _last_check
+    now = time.monotonic()
+    if _table is not None and now - _last_check < CHECK_INTERVAL:
+        return _table
+    with _table_lock:
+        _last_check = now
+        try:
+            version = os.stat(NEIGHBOURS_PATH).st_mtime_ns
+        except OSError:
+            return _table
+        if version != _table_version:
+            try:
+                _table = NeighbourTable.load(NEIGHBOURS_PATH, with_vectors=False)
+                _table_version = version
+            except (OSError, ValueError, KeyError) as exc:
+                print(f"[neighbours] Could not load {NEIGHBOURS_PATH}: {exc}")
+        return _table
+
+
+def get_neighbour_table() -> NeighbourTable | None:
+    """The process's neighbour table, or None if none has been built.
+
+    In shared mode the lists are reloaded from the file the catalog loader
+    keeps current. Otherwise the table is loaded once with its vectors,
+    caught up from its high-water mark and subscribed to the change feed.
+    """
+    global _table
+    if CATALOG_SHARED:
+        return _shared_table()
+    if _table is not None:
+        return _table
+    with _table_lock:
+        if _table is None and os.path.exists(NEIGHBOURS_PATH):
+            from helpers.change_feed import catalog_feed
+
+            try:
+                table = NeighbourTable.load(NEIGHBOURS_PATH)
+            except (OSError, ValueError, KeyError) as exc:
+                print(f"[neighbours] Could not load {NEIGHBOURS_PATH}: {exc}")
+                return None
+            # Subscribe first so nothing emitted during the catch-up is missed.
+            catalog_feed.register(table)
+            changes = catch_up(table)
+            if changes:
+                print(f"[neighbours] Applied {changes} changes made since the table was saved")
+            _table = table
+    return _table
+
+
+if __name__ == "__main__":
+    from db_service import iter_all
+    from helpers.change_feed import ChangeFeed, HighWaterMarkPoller
+
+    started = time.perf_counter()
+    # Seed before the scan: rows changed while it runs are replayed on load.
+    poller = HighWaterMarkPoller(ChangeFeed(), interval=0)
+    poller.seed()
+    columns = ", ".join(META_FIELDS + ("embedding",))
+    table = NeighbourTable.build(iter_all("products", columns), high_water_mark=poller.high_water_mark)
+    table.save(NEIGHBOURS_PATH)
+    print(
+        f"[neighbours] {table.ids.size} products, k={table.k}, "
+        f"{time.perf_counter() - started:.1f}s -> {NEIGHBOURS_PATH}"
+    )
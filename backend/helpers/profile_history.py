@@ -0,0 +1,76 @@
+"""
+Per-user ring buffer of recent profile updates, for O(1) undo.
+
+Each swipe that moves a user's profile records the profile as it was before
+the update (float32, which is what the vector column stores anyway) plus the
+like/dislike counters. Undoing the last swipe restores that snapshot exactly
+instead of replaying the user's whole history.
+
+The buffer lives in process memory, in the user's ``UserState``. Each record
+also keeps a digest of the profile its swipe wrote, so ``undo_last_swipe`` can
+tell when the user's latest swipe or profile has since changed elsewhere
+(another worker, a profile rebuild) and fall back to inverting the EMA step
+algebraically instead of restoring a stale snapshot.
+"""
+
+import hashlib
+import os
+from collections import deque
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from helpers.user_state import ShardedUserState, user_states
+
+UNDO_HISTORY_SIZE = int(os.getenv("UNDO_HISTORY_SIZE", "10"))
+
+
+@dataclass(frozen=True)
+class SwipeRecord:
+    product_id: int
+    liked: bool
+    # Profile before this swipe; None if the swipe created it.
+    previous: np.ndarray | None
+    total_likes: int
+    total_dislikes: int
+    # False when the swipe didn't move the profile (product had no embedding).
+    applied: bool = True
+    # ``profile_digest`` of the profile this swipe wrote.
+    written: str | None = None
+
+
+def profile_digest(vector) -> str | None:
+    """Short digest of a profile as stored (float32), for cheap equality checks."""
+    if vector is None:
+        return None
+    data = np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+class ProfileHistory:
+    def __init__(self, states: ShardedUserState, size: int = UNDO_HISTORY_SIZE):
+        self.states = states
+        self.size = size
+
+    def push(self, user_id: int, record: SwipeRecord):
+        if record.previous is not None:
+            record = replace(record, previous=np.asarray(record.previous, dtype=np.float32))
+        state = self.states.get(user_id)
+        with state.lock:
+            if state.history is None:
+                state.history = deque(maxlen=self.size)
+            state.history.append(record)
+
+    def pop(self, user_id: int) -> SwipeRecord | None:
+        state = self.states.get(user_id)
+        with state.lock:
+            return state.history.pop() if state.history else None
+
+    def clear(self, user_id: int):
+        state = self.states.get(user_id)
+        with state.lock:
+            if state.history:
+                state.history.clear()
+
+
+profile_history = ProfileHistory(user_states)
@@ -0,0 +1,209 @@
+"""
+Offline recomputation of every user's profile vector from the swipe log.
+
+The live profile is an exponential moving average updated one swipe at a time
+(see ``update_user_embedding``). Replaying a user's swipes e_1..e_n with
+directions d_i gives the closed form
+
+    u_n = (1 - a)^(n-1) * d_1 * e_1 + sum_{i>=2} a * (1 - a)^(n-i) * d_i * e_i
+
+so a whole chunk of users is one weighted segment-sum over their swipe rows.
+``user_products`` is streamed page by page in ``(user_id, order column,
+product_id)`` order, each page starting after the last row read, so an undo
+deleting rows mid-scan can't shift a page and skip another user's swipe.
+Users are processed in chunks and written back with bulk upserts. The swipe
+endpoints keep running meanwhile: the newest swipe is noted before streaming
+starts, and a user with a newer swipe row that the rebuild didn't read is left
+alone (see ``--force``).
+Re-swiping an already-swiped product only updates its row, so that case is not
+detected. The rebuild replays one swipe per product anyway.
+
+Run from the backend directory:
+
+    python -m helpers.rebuild_profiles [--alpha 0.1] [--dry-run]
+"""
+
+import time
+
+import numpy as np
+
+from db_service import iter_all
+from supabase_client import supabase
+
+USER_CHUNK_SIZE = 500
+PAGE_SIZE = 1000
+
+
+def load_product_vectors() -> tuple[np.ndarray, np.ndarray]:
+    """Sorted product ids and their float32 embedding matrix."""
+    from helpers.shared_catalog import build_catalog, get_catalog
+
+    catalog = get_catalog()
+    if catalog is not None:
+        return catalog.ids, catalog.matrix
+    ids, matrix, _ = build_catalog(iter_all("products", "id, embedding", page_size=PAGE_SIZE))
+    return ids, matrix
+
+
+def ema_weights(positions: np.ndarray, counts: np.ndarray, alpha: float) -> np.ndarray:
+    """Weight of each swipe in its user's replayed EMA.
+
+    ``positions`` is the 0-based index of the swipe within its user's history
+    and ``counts`` that user's total number of swipes, both per row.
+    """
+    decay = (1.0 - alpha) ** (counts - 1 - positions)
+    return np.where(positions == 0, decay, alpha * decay)
+
+
+def compute_profiles(
+    user_ids: np.ndarray,
+    product_rows: np.ndarray,
+    liked: np.ndarray,
+    matrix: np.ndarray,
+    alpha: float,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Replay swipes for a chunk of users.
+
+    Rows must be grouped by user and in swipe order within each user.
+    Returns (unique user ids, profiles, like counts, dislike counts).
+    """
+    starts = np.flatnonzero(np.r_[True, user_ids[1:] != user_ids[:-1]])
+    counts = np.diff(np.r_[starts, user_ids.size])
+    positions = np.arange(user_ids.size) - np.repeat(starts, counts)
+
+    directions = np.where(liked, 1.0, -1.0).astype(np.float32)
+    weights = ema_weights(positions, np.repeat(counts, counts), alpha).astype(np.float32)
+    contributions = matrix[product_rows] * (weights * directions)[:, None]
+    profiles = np.add.reduceat(contributions, starts, axis=0)
+
+    likes = np.add.reduceat(liked.astype(np.int64), starts)
+    return user_ids[starts], profiles, likes, counts - likes
+
+
+def _latest_swipe(order_column: str):
+    """Largest ``order_column`` value in the swipe log, or None if it's empty."""
+    res = (
+        supabase.table("user_products")
+        .select(order_column)
+        .order(order_column, desc=True)
+        .limit(1)
+        .execute()
+    )
+    return res.data[0][order_column] if res.data else None
+
+
+def _swiped_since(user_ids: list[int], order_column: str, since) -> set[tuple[int, int]]:
+    """(user_id, product_id) of this chunk's swipe rows logged after ``since``."""
+    query = supabase.table("user_products").select("user_id, product_id").in_("user_id", user_ids)
+    if since is not None:
+        query = query.gt(order_column, since)
+    return {(row["user_id"], row["product_id"]) for row in query.execute().data or []}
+
+
+def _process_chunk(rows: list[dict], ids, matrix, alpha, dry_run, force, stats, order_column, since):
+    # Re-swipes are upserts, so (user, product) is unique, but a row whose order
+    # value changes mid-scan can be read twice: keep the first one seen.
+    unique = {}
+    for row in rows:
+        unique.setdefault((row["user_id"], row["product_id"]), row)
+    rows = list(unique.values())
+
+    product_ids = np.fromiter((row["product_id"] for row in rows), dtype=np.int64, count=len(rows))
+    product_rows = np.clip(np.searchsorted(ids, product_ids), 0, max(ids.size - 1, 0))
+    # The live update skips swipes on products without an embedding; so do we.
+    known = ids.size > 0 and ids[product_rows] == product_ids
+    if not np.any(known):
+        return
+    user_ids = np.fromiter((row["user_id"] for row in rows), dtype=np.int64, count=len(rows))[known]
+    liked = np.fromiter((bool(row["liked"]) for row in rows), dtype=bool, count=len(rows))[known]
+
+    users, profiles, likes, dislikes = compute_profiles(
+        user_ids, product_rows[known], liked, matrix, alpha
+    )
+    stats["users"] += users.size
+    stats["swipes"] += user_ids.size
+
+    # New swipe rows we didn't read mean the live profile is newer than ours.
+    newer = set() if force else _swiped_since(users.tolist(), order_column, since) - unique.keys()
+    busy = {user_id for user_id, _ in newer}
+    payload = []
+    for user_id, profile, n_likes, n_dislikes in zip(users.tolist(), profiles, likes, dislikes):
+        if user_id in busy:
+            stats["skipped"] += 1
+            continue
+        payload.append(
+            {
+                "id": user_id,
+                "embedding": profile.tolist(),
+                "total_likes": int(n_likes),
+                "total_dislikes": int(n_dislikes),
+            }
+        )
+    if payload and not dry_run:
+        supabase.table("users").upsert(payload, on_conflict="id").execute()
+    stats["written"] += len(payload)
+
+
+def rebuild_profiles(
+    alpha: float,
+    order_column: str = "created_at",
+    chunk_size: int = USER_CHUNK_SIZE,
+    dry_run: bool = False,
+    force: bool = False,
+) -> dict:
+    started = time.perf_counter()
+    ids, matrix = load_product_vectors()
+    stats = {"users": 0, "swipes": 0, "written": 0, "skipped": 0}
+    # Noted before streaming: anything logged after it was (or may have been) missed.
+    since = _latest_swipe(order_column)
+
+    swipes = iter_all(
+        "user_products",
+        f"user_id, product_id, liked, {order_column}",
+        page_size=PAGE_SIZE,
+        # product_id breaks ties so the key is unique and paging is exact.
+        order=("user_id", order_column, "product_id"),
+    )
+    chunk: list[dict] = []
+    users_in_chunk = 0
+    last_user = None
+    for row in swipes:
+        if row["user_id"] != last_user:
+            if users_in_chunk >= chunk_size:
+                _process_chunk(chunk, ids, matrix, alpha, dry_run, force, stats, order_column, since)
+                chunk, users_in_chunk = [], 0
+            users_in_chunk += 1
+            last_user = row["user_id"]
+        chunk.append(row)
+    if chunk:
+        _process_chunk(chunk, ids, matrix, alpha, dry_run, force, stats, order_column, since)
+
+    stats["seconds"] = round(time.perf_counter() - started, 1)
+    return stats
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.routes.swipes import ALPHA
+
+    parser = argparse.ArgumentParser(description="Recompute user profiles from user_products.")
+    parser.add_argument("--alpha", type=float, default=ALPHA, help=f"EMA rate (default {ALPHA})")
+    parser.add_argument(
+        "--order-column",
+        default="created_at",
+        help="user_products column giving swipe order (default created_at)",
+    )
+    parser.add_argument("--chunk-size", type=int, default=USER_CHUNK_SIZE, help="users per upsert")
+    parser.add_argument("--dry-run", action="store_true", help="compute but don't write")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="overwrite users even if they swiped while the rebuild was running",
+    )
+    args = parser.parse_args()
+
+    print(
+        "[profiles]",
+        rebuild_profiles(args.alpha, args.order_column, args.chunk_size, args.dry_run, args.force),
+    )
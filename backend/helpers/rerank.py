@@ -0,0 +1,88 @@
+"""
+Maximal-marginal-relevance (MMR) re-ranking for recommendation batches.
+
+Plain argmax-cosine keeps serving near-duplicates of whatever the user liked
+last. MMR picks each next item by trading relevance to the user against
+similarity to what has already been picked:
+
+    score_i = lambda * rel_i - (1 - lambda) * max_{j in picked} sim(i, j)
+
+The running ``max_sim`` vector is updated with one matrix-vector product per
+pick, so choosing K items from N candidates costs O(K * N * D) in NumPy with
+no pairwise Python loops.
+"""
+
+import os
+
+import numpy as np
+
+from helpers.neighbours import normalise
+
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+MMR_BATCH_SIZE = int(os.getenv("MMR_BATCH_SIZE", "5"))
+# Max items per category in one batch; 0 disables the quota.
+MMR_CATEGORY_QUOTA = int(os.getenv("MMR_CATEGORY_QUOTA", "0"))
+# Only the most relevant candidates are re-ranked.
+MMR_POOL_SIZE = int(os.getenv("MMR_POOL_SIZE", "200"))
+
+
+def top_relevant(scores: np.ndarray, pool_size: int = MMR_POOL_SIZE) -> np.ndarray:
+    """Indices of the ``pool_size`` highest finite scores (unordered)."""
+    finite = np.flatnonzero(np.isfinite(scores))
+    if finite.size <= pool_size:
+        return finite
+    part = np.argpartition(-scores[finite], pool_size - 1)[:pool_size]
+    return finite[part]
+
+
+def mmr_select(
+    query: np.ndarray,
+    candidates: np.ndarray,
+    k: int = MMR_BATCH_SIZE,
+    lam: float = MMR_LAMBDA,
+    categories=None,
+    category_quota: int = MMR_CATEGORY_QUOTA,
+    recent: np.ndarray | None = None,
+) -> list[int]:
+    """Pick up to ``k`` candidate row indices, most valuable first.
+
+    ``candidates`` is an (N, D) embedding matrix and ``query`` the user's
+    vector. ``categories`` (length N) with ``category_quota`` > 0 caps how many
+    picks may share a category. ``recent`` (M, D) holds items already shown,
+    so a new batch is also kept away from the previous one.
+    """
+    n = candidates.shape[0]
+    if n == 0 or k <= 0:
+        return []
+
+    unit = normalise(candidates)
+    q = normalise(np.asarray(query, dtype=np.float32)[None, :])[0]
+    relevance = unit @ q
+
+    # Cosine is >= -1, so -1 means "not similar to anything picked yet".
+    max_sim = np.full(n, -1.0, dtype=np.float32)
+    if recent is not None and len(recent):
+        max_sim = np.maximum(max_sim, (unit @ normalise(recent).T).max(axis=1))
+
+    available = np.ones(n, dtype=bool)
+    codes = counts = None
+    if categories is not None and category_quota > 0:
+        labels = np.array(["" if c is None else str(c) for c in categories])
+        _, codes = np.unique(labels, return_inverse=True)
+        counts = np.zeros(codes.max() + 1, dtype=np.int64)
+
+    picked: list[int] = []
+    for _ in range(min(k, n)):
+        score = lam * relevance - (1.0 - lam) * max_sim
+        score[~available] = -np.inf
+        best = int(np.argmax(score))
+        if not np.isfinite(score[best]):
+            break
+        picked.append(best)
+        available[best] = False
+        if codes is not None:
+            counts[codes[best]] += 1
+            if counts[codes[best]] >= category_quota:
+                available &= codes != codes[best]
+        np.maximum(max_sim, unit @ unit[best], out=max_sim)
+    return picked
@@ -0,0 +1,340 @@
+"""
+Read-only product catalog shared between WSGI worker processes.
+
+One loader process publishes the embedding matrix, the id map and the display
+metadata into a memory-mapped file; every worker maps the same file instead of
+fetching and holding its own copy. Each publish writes a new generation and
+then flips a small ``CURRENT`` pointer file, so workers swap atomically.
+
+Run the loader from the backend directory:
+
+    python -m helpers.shared_catalog              # publish once
+    python -m helpers.shared_catalog --interval 300
+    python -m helpers.shared_catalog --follow     # apply the change feed
+
+and start the workers with ``CATALOG_SHARED=1``.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+CATALOG_SHARED = os.getenv("CATALOG_SHARED", "0") == "1"
+CATALOG_DIR = os.getenv("CATALOG_SHM_DIR") or os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+    "trendswipe-catalog",
+)
+# How often a worker checks the pointer file for a newer generation (seconds).
+CHECK_INTERVAL = float(os.getenv("CATALOG_CHECK_INTERVAL", "2"))
+# Generations kept on disk (current included) for workers still swapping over.
+KEEP_GENERATIONS = 2
+
+META_FIELDS = (
+    "id",
+    "external_id",
+    "name",
+    "description",
+    "price",
+    "category",
+    "image_url",
+    "tags",
+)
+
+_MAGIC = b"TSCAT001"
+# magic, generation, rows, dim, metadata bytes
+_HEADER = struct.Struct("<8sQQQQ")
+_HEADER_SIZE = 64
+_CURRENT = "CURRENT"
+
+
+def _align(offset: int, to: int = 8) -> int:
+    return (offset + to - 1) // to * to
+
+
+_GENERATION_FILE = re.compile(r"catalog-(\d+)\.bin")
+
+
+def _generation_path(generation: int) -> str:
+    return os.path.join(CATALOG_DIR, f"catalog-{generation}.bin")
+
+
+def read_current_generation() -> int:
+    """Return the generation the pointer file names, or 0 if none is published."""
+    try:
+        with open(os.path.join(CATALOG_DIR, _CURRENT), "r", encoding="ascii") as fh:
+            return int(fh.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+class CatalogView:
+    """Zero-copy, read-only view over one published catalog generation."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, generation, rows, dim, meta_len = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a published catalog file")
+
+        self.generation = generation
+        self.dim = dim
+
+        offset = _HEADER_SIZE
+        self.ids = np.frombuffer(self._mm, dtype=np.int64, count=rows, offset=offset)
+        offset += rows * 8
+        self.matrix = np.frombuffer(
+            self._mm, dtype=np.float32, count=rows * dim, offset=offset
+        ).reshape(rows, dim)
+        offset = _align(offset + rows * dim * 4)
+        self.norms = np.frombuffer(self._mm, dtype=np.float32, count=rows, offset=offset)
+        offset = _align(offset + rows * 4)
+        self._offsets = np.frombuffer(
+            self._mm, dtype=np.int64, count=rows + 1, offset=offset
+        )
+        self._meta_start = offset + (rows + 1) * 8
+        self._meta_len = meta_len
+
+    def __len__(self) -> int:
+        return int(self.ids.shape[0])
+
+    def index_of(self, product_id: int) -> int | None:
+        """Row index for a product id (ids are stored sorted)."""
+        i = int(np.searchsorted(self.ids, product_id))
+        if i < len(self) and self.ids[i] == product_id:
+            return i
+        return None
+
+    def metadata(self, index: int) -> dict:
+        """Display fields for the product at row ``index``."""
+        start = self._meta_start + int(self._offsets[index])
+        end = self._meta_start + int(self._offsets[index + 1])
+        return json.loads(self._mm[start:end])
+
+    def embedding(self, product_id: int) -> np.ndarray | None:
+        i = self.index_of(product_id)
+        return None if i is None else self.matrix[i]
+
+
+def build_catalog(rows) -> tuple[np.ndarray, np.ndarray, list[dict]]:
+    """Turn product rows into (sorted ids, float32 matrix, metadata) arrays.
+
+    Rows without a usable embedding are skipped; the dimension is taken from
+    the first valid embedding.
+    """
+    from helpers.algorithm import parse_embedding
+
+    entries = []
+    dim = None
+    for row in rows:
+        emb = parse_embedding(row.get("embedding"))
+        if emb is None or emb.ndim != 1 or emb.size == 0:
+            continue
+        if dim is None:
+            dim = emb.size
+        if emb.size != dim:
+            continue
+        meta = {field: row.get(field) for field in META_FIELDS}
+        entries.append((int(row["id"]), emb, meta))
+
+    entries.sort(key=lambda entry: entry[0])
+    ids = np.array([entry[0] for entry in entries], dtype=np.int64)
+    matrix = np.zeros((len(entries), dim or 0), dtype=np.float32)
+    for i, (_, emb, _) in enumerate(entries):
+        matrix[i] = emb
+    return ids, matrix, [entry[2] for entry in entries]
+
+
+def write_catalog(ids: np.ndarray, matrix: np.ndarray, metas: list[dict]) -> int:
+    """Write a new generation and point ``CURRENT`` at it. Returns the generation."""
+    os.makedirs(CATALOG_DIR, exist_ok=True)
+    generation = read_current_generation() + 1
+    rows, dim = matrix.shape
+
+    blobs = [json.dumps(meta, separators=(",", ":")).encode() for meta in metas]
+    offsets = np.zeros(rows + 1, dtype=np.int64)
+    if blobs:
+        offsets[1:] = np.cumsum([len(blob) for blob in blobs])
+    norms = np.linalg.norm(matrix, axis=1).astype(np.float32)
+
+    path = _generation_path(generation)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(_HEADER.pack(_MAGIC, generation, rows, dim, int(offsets[-1])))
+        fh.write(b"\0" * (_HEADER_SIZE - _HEADER.size))
+        fh.write(ids.astype(np.int64).tobytes())
+        fh.write(np.ascontiguousarray(matrix, dtype=np.float32).tobytes())
+        fh.write(b"\0" * (_align(fh.tell()) - fh.tell()))
+        fh.write(norms.tobytes())
+        fh.write(b"\0" * (_align(fh.tell()) - fh.tell()))
+        fh.write(offsets.tobytes())
+        for blob in blobs:
+            fh.write(blob)
+    os.replace(tmp_path, path)
+
+    pointer = os.path.join(CATALOG_DIR, _CURRENT)
+    with open(f"{pointer}.tmp", "w", encoding="ascii") as fh:
+        fh.write(str(generation))
+    os.replace(f"{pointer}.tmp", pointer)
+
+    # Workers still mapping an old generation keep their pages until they swap.
+    # List the directory rather than probing every generation ever published.
+    for name in os.listdir(CATALOG_DIR):
+        match = _GENERATION_FILE.fullmatch(name)
+        if match and int(match.group(1)) <= generation - KEEP_GENERATIONS:
+            try:
+                os.remove(os.path.join(CATALOG_DIR, name))
+            except OSError:
+                pass
+
+    return generation
+
+
+def publish_catalog(rows=None) -> int:
+    """Load the products table (unless rows are given) and publish it."""
+    if rows is None:
+        from db_service import iter_all
+
+        columns = ", ".join(META_FIELDS + ("embedding",))
+        rows = iter_all("products", columns)
+    ids, matrix, metas = build_catalog(rows)
+    generation = write_catalog(ids, matrix, metas)
+    print(f"[catalog] Published generation {generation} with {len(ids)} products")
+    return generation
+
+
+class CatalogPublisher:
+    """Change-feed consumer that keeps the loader's rows current.
+
+    Changes are applied to the in-memory rows as they arrive; the loader calls
+    ``publish_if_dirty`` to write at most one new generation per tick.
+    """
+
+    def __init__(self, rows):
+        self.rows = {int(row["id"]): row for row in rows}
+        self.dirty = False
+        self._lock = threading.Lock()
+
+    def upsert(self, row: dict):
+        with self._lock:
+            product_id = int(row["id"])
+            self.rows[product_id] = {**self.rows.get(product_id, {}), **row}
+            self.dirty = True
+
+    def delete(self, product_id: int):
+        with self._lock:
+            if self.rows.pop(product_id, None) is not None:
+                self.dirty = True
+
+    def publish_if_dirty(self) -> int | None:
+        with self._lock:
+            if not self.dirty:
+                return None
+            rows = list(self.rows.values())
+            self.dirty = False
+        return publish_catalog(rows)
+
+
+_view: CatalogView | None = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+
+def get_catalog() -> CatalogView | None:
+    """Return the current shared catalog, or None when shared mode is off.
+
+    Callers should hold on to the returned view for the duration of a request;
+    a newer generation replaces the module-level reference but never closes a
+    view that is still in use.
+    """
+    global _view, _last_check
+    if not CATALOG_SHARED:
+        return None
+
+    now = time.monotonic()
+    if _view is not None and now - _last_check < CHECK_INTERVAL:
+        return _view
+
+    with _lock:
+        if _view is not None and now - _last_check < CHECK_INTERVAL:
+            return _view
+        _last_check = now
+        generation = read_current_generation()
+        if generation and (_view is None or _view.generation != generation):
+            try:
+                _view = CatalogView(_generation_path(generation))
+            except (OSError, ValueError) as exc:
+                print(f"[catalog] Could not attach generation {generation}: {exc}")
+        return _view
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Publish the shared product catalog.")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0,
+        help="republish every N seconds (default: publish once and exit)",
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="keep running and republish as the catalog change feed reports changes",
+    )
+    args = parser.parse_args()
+
+    if args.follow:
+        from db_service import iter_all
+        from helpers.change_feed import (
+            FEED_POLL_INTERVAL,
+            HighWaterMarkPoller,
+            catalog_feed,
+            start_catalog_feed,
+        )
+
+        from helpers.neighbours import NEIGHBOURS_PATH, NeighbourTable, catch_up
+
+        poller = HighWaterMarkPoller(catalog_feed, FEED_POLL_INTERVAL or 30)
+        # Seed before the scan: rows changed while it runs are replayed after it.
+        poller.seed()
+        columns = ", ".join(META_FIELDS + ("embedding",))
+        publisher = CatalogPublisher(iter_all("products", columns))
+        publish_catalog(list(publisher.rows.values()))
+        catalog_feed.register(publisher)
+
+        # Workers map only the neighbour lists; this process keeps the vectors
+        # and re-saves the file as the catalog changes.
+        neighbours = None
+        if os.path.exists(NEIGHBOURS_PATH):
+            neighbours = NeighbourTable.load(NEIGHBOURS_PATH)
+            catalog_feed.register(neighbours)
+            catch_up(neighbours)
+
+        poller.start()
+        # Realtime only, if configured; the poller above is already running.
+        start_catalog_feed(poll_interval=0)
+        last_reconcile = time.monotonic()
+        while True:
+            time.sleep(1)
+            if time.monotonic() - last_reconcile >= poller.interval:
+                # The poller never sees deletes; drop products gone from the table.
+                poller.reconcile(list(publisher.rows))
+                last_reconcile = time.monotonic()
+            publisher.publish_if_dirty()
+            if neighbours is not None:
+                neighbours.save_if_dirty(poller.high_water_mark)
+
+    publish_catalog()
+    while args.interval > 0:
+        time.sleep(args.interval)
+        publish_catalog()
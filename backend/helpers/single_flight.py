@@ -0,0 +1,78 @@
+"""
+Single-flight coalescing for identical concurrent reads.
+
+When several requests ask for exactly the same Supabase query at once (say,
+every client loading the catalog right after a deploy), only the first one
+runs it; the rest wait for and share its result.
+"""
+
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time and share its outcome.
+
+    Results are handed to every waiter as the same object, so callers must
+    treat them as read-only (copy before mutating).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict = {}
+        self.requests = 0
+        self.executions = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            self.requests += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            coalesced = self.requests - self.executions
+            return {
+                "requests": self.requests,
+                "executions": self.executions,
+                "coalesced": coalesced,
+                "coalesce_rate": round(coalesced / self.requests, 4) if self.requests else 0.0,
+                "in_flight": len(self._calls),
+            }
+
+
+def query_key(table: str, columns: str, *filters) -> tuple:
+    """Key identifying a read by table, projection and filters."""
+    return (table, " ".join(columns.split()), filters)
+
+
+# Shared by every Supabase read path in this process.
+supabase_flight = SingleFlight()
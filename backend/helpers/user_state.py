@@ -0,0 +1,126 @@
+"""
+Per-user recommendation state, partitioned into lock-striped shards.
+
+Each shopper gets a ``UserState``: the products already served, the MMR batch
+still pending, the vectors of the last few products served and the undo
+history. Users hash to one of ``USER_STATE_SHARDS`` shards, and a shard's lock
+is held only long enough to find or create an entry. Ranking, swipes and
+undo run under the user's own lock, so concurrent users never wait on each
+other, while one user's requests take turns: they can't both be served the
+same product, lose an EMA step or restore the wrong snapshot. The lock is per
+process; with several workers a user's requests should be routed to one of
+them.
+
+Each shard keeps at most ``USER_STATE_MAX_USERS / USER_STATE_SHARDS`` users
+and drops the least recently active one whose lock is free; a state some
+request is still working under is never dropped, or the user's next request
+would get a second state and a second lock. A dropped or brand-new state is
+reseeded from ``user_products``, so nothing the user swiped is shown again.
+"""
+
+import os
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from helpers.rerank import MMR_BATCH_SIZE
+
+USER_STATE_SHARDS = int(os.getenv("USER_STATE_SHARDS", "64"))
+USER_STATE_MAX_USERS = int(os.getenv("USER_STATE_MAX_USERS", "100000"))
+
+
+@dataclass
+class UserState:
+    # Product ids served to or swiped by this user.
+    seen: set[int] = field(default_factory=set)
+    # MMR-ranked (product, vector) pairs not served yet; cleared by every
+    # swipe and undo, since they were ranked for the profile before it.
+    pending: list[tuple[dict, np.ndarray]] = field(default_factory=list)
+    # Vectors of the last few products served, so consecutive batches stay diverse.
+    recent: deque = field(default_factory=lambda: deque(maxlen=MMR_BATCH_SIZE))
+    # Undo ring buffer, created by ``ProfileHistory`` on the first swipe.
+    history: deque | None = None
+    # (unit profile, fingerprint) the chat cache bucketed this user by.
+    taste_anchor: tuple[np.ndarray, str] | None = None
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+
+
+class _Shard:
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users: OrderedDict = OrderedDict()
+
+
+class ShardedUserState:
+    def __init__(
+        self,
+        shards: int = USER_STATE_SHARDS,
+        max_users: int = USER_STATE_MAX_USERS,
+        loader=None,
+    ):
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        self.per_shard = max(1, max_users // len(self._shards))
+        # loader(user_id) -> set of product ids already swiped.
+        self.loader = loader
+
+    def _shard(self, user_id) -> _Shard:
+        return self._shards[hash(user_id) % len(self._shards)]
+
+    def get(self, user_id) -> UserState:
+        """The user's state, created (and seeded by ``loader``) on first use."""
+        shard = self._shard(user_id)
+        with shard.lock:
+            state = shard.users.get(user_id)
+            if state is not None:
+                shard.users.move_to_end(user_id)
+                return state
+            state = shard.users[user_id] = UserState()
+            if len(shard.users) > self.per_shard:
+                self._evict(shard, keep=user_id)
+            # Seeding hits the network; hold the user's lock, not the shard's.
+            state.lock.acquire()
+        try:
+            if self.loader is not None:
+                state.seen.update(self.loader(user_id))
+        except Exception as exc:  # noqa: BLE001
+            print(f"[user-state] Could not load seen products for user {user_id}: {exc!r}")
+        finally:
+            state.lock.release()
+        return state
+
+    @staticmethod
+    def _evict(shard: _Shard, keep):
+        """Drop the least recently used state not in use (caller holds shard.lock)."""
+        for user_id, state in shard.users.items():
+            if user_id == keep:
+                continue
+            if state.lock.acquire(blocking=False):
+                state.lock.release()
+                del shard.users[user_id]
+                return
+        # Everything is in use: stay over capacity until a later get.
+
+    def discard(self, user_id):
+        shard = self._shard(user_id)
+        with shard.lock:
+            shard.users.pop(user_id, None)
+
+    def __len__(self) -> int:
+        return sum(len(shard.users) for shard in self._shards)
+
+    def metrics(self) -> dict:
+        sizes = [len(shard.users) for shard in self._shards]
+        return {"users": sum(sizes), "shards": len(sizes), "largest_shard": max(sizes)}
+
+
+def _load_seen(user_id) -> set[int]:
+    from helpers.algorithm import get_seen_product_ids
+
+    return get_seen_product_ids(user_id)
+
+
+user_states = ShardedUserState(loader=_load_seen)
@@ -0,0 +1,57 @@
+"""
+Latency benchmark for MMR re-ranking at different catalog sizes.
+
+Run from the backend directory:
+
+    python -m scripts.bench_mmr
+    python -m scripts.bench_mmr --sizes 1000 10000 100000 --k 10 --dim 768
+
+"full" re-ranks every candidate; "pooled" is what /next-product does: take
+the MMR_POOL_SIZE most relevant candidates and re-rank only those.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from helpers.rerank import MMR_POOL_SIZE, mmr_select, top_relevant
+
+
+def _time(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    query = rng.standard_normal(args.dim).astype(np.float32)
+    print(f"{'N':>8} {'full ms':>10} {'pooled ms':>10}   (k={args.k}, dim={args.dim}, pool={MMR_POOL_SIZE})")
+    for n in args.sizes:
+        matrix = rng.standard_normal((n, args.dim)).astype(np.float32)
+        categories = rng.integers(0, 20, n).astype(str)
+
+        def full():
+            mmr_select(query, matrix, args.k, categories=categories, category_quota=3)
+
+        def pooled():
+            scores = matrix @ query
+            pool = top_relevant(scores)
+            mmr_select(query, matrix[pool], args.k, categories=categories[pool], category_quota=3)
+
+        print(f"{n:>8} {_time(full, args.repeats):>10.1f} {_time(pooled, args.repeats):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Load test for the swipe loop: throughput as the number of concurrent users grows.
+
+Start the API, then run from the backend directory:
+
+    python -m scripts.load_test --url http://localhost:5000/api
+    python -m scripts.load_test --users 1 2 4 8 16 32 --seconds 10
+
+Each simulated user runs its own session (GET /next-product, then
+POST /register-swipe) as fast as the server answers. Tokens are minted with
+SUPABASE_JWT_SECRET, one auth uuid per simulated user, so every user has its
+own users row and recommendation state. "scaling" is throughput relative to N times the
+single-user rate; close to 1.0 means users don't slow each other down.
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+import uuid
+
+import jwt
+import requests
+
+from app.auth import SUPABASE_JWT_AUDIENCE
+
+
+def mint_token(secret: str, user_number: int) -> str:
+    """Token for a stable fake auth uuid; the API creates its users row on first use."""
+    now = int(time.time())
+    sub = str(uuid.uuid5(uuid.NAMESPACE_URL, f"load-test/{user_number}"))
+    claims = {"sub": sub, "aud": SUPABASE_JWT_AUDIENCE, "iat": now, "exp": now + 3600}
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+def _user_loop(url: str, token: str | None, stop: threading.Event, counts: list, errors: list):
+    session = requests.Session()
+    if token:
+        session.headers["Authorization"] = f"Bearer {token}"
+    while not stop.is_set():
+        try:
+            response = session.get(f"{url}/next-product", timeout=30)
+            response.raise_for_status()
+            counts.append(1)
+            product = response.json().get("product")
+            if product is None:
+                return
+            response = session.post(
+                f"{url}/register-swipe",
+                json={"product_id": product["id"], "liked": random.random() < 0.5},
+                timeout=30,
+            )
+            response.raise_for_status()
+            counts.append(1)
+        except requests.RequestException as exc:
+            errors.append(exc)
+            if len(errors) == 1:
+                print(f"  first error: {exc!r}")
+            stop.wait(0.1)
+
+
+def run(url: str, secret: str, users: int, seconds: float, first_user: int) -> tuple[float, int]:
+    stop = threading.Event()
+    # list.append is atomic; one shared list avoids a lock in the hot loop.
+    counts: list = []
+    errors: list = []
+    threads = [
+        threading.Thread(
+            target=_user_loop,
+            args=(url, mint_token(secret, first_user + i) if secret else None, stop, counts, errors),
+            daemon=True,
+        )
+        for i in range(users)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return len(counts) / (time.perf_counter() - started), len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:5000/api")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--first-user", type=int, default=0, help="number of the first simulated user")
+    args = parser.parse_args()
+
+    secret = os.getenv("SUPABASE_JWT_SECRET", "")
+    if not secret:
+        print("SUPABASE_JWT_SECRET is not set: every request runs as the dev user, so users will serialize.")
+
+    baseline = None
+    print(f"{'users':>6} {'req/s':>10} {'per user':>10} {'scaling':>8} {'errors':>7}")
+    for users in args.users:
+        # Fresh ids per round so no user starts with an exhausted catalog.
+        throughput, errors = run(args.url, secret, users, args.seconds, args.first_user)
+        args.first_user += users
+        if baseline is None:
+            baseline = throughput / users
+        scaling = throughput / (baseline * users) if baseline else 0.0
+        print(f"{users:>6} {throughput:>10.1f} {throughput / users:>10.1f} {scaling:>8.2f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
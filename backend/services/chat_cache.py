@@ -0,0 +1,223 @@
+"""
+Semantic response cache for the style chat.
+
+Lots of chat questions are near-identical ("what goes with these jeans?"), so
+answers are cached by the embedding of the normalised question plus a
+fingerprint of the user's taste. A new question reuses an answer when a cached
+question with the same fingerprint is at least ``CHAT_CACHE_THRESHOLD``
+cosine-similar. Entries expire after a TTL and the least recently used one is
+evicted when the cache is full.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from helpers.user_state import ShardedUserState, user_states
+from services.embedding_client import EmbeddingError, create_embedding
+from services.gemini_client import chat_with_gemini
+
+CHAT_CACHE_THRESHOLD = float(os.getenv("CHAT_CACHE_THRESHOLD", "0.95"))
+CHAT_CACHE_TTL = float(os.getenv("CHAT_CACHE_TTL", "3600"))
+CHAT_CACHE_SIZE = int(os.getenv("CHAT_CACHE_SIZE", "1000"))
+# Taste buckets are 2**bits; fewer bits = more sharing between users.
+CHAT_CACHE_TASTE_BITS = int(os.getenv("CHAT_CACHE_TASTE_BITS", "6"))
+# A user keeps their bucket until their profile drifts below this cosine from
+# the profile it was assigned for.
+CHAT_CACHE_TASTE_DRIFT = float(os.getenv("CHAT_CACHE_TASTE_DRIFT", "0.9"))
+
+_planes: dict[int, np.ndarray] = {}
+
+
+def normalize_question(text: str) -> str:
+    text = re.sub(r"\s+", " ", text.lower()).strip()
+    return text.strip(" ?!.")
+
+
+def taste_fingerprint(user_embedding: np.ndarray | None, bits: int = CHAT_CACHE_TASTE_BITS) -> str:
+    """Coarse bucket of the user's profile, so similar tastes share answers.
+
+    Sign bits of a fixed random projection (SimHash): profiles a small angle
+    apart usually land in the same bucket. The same bucket isn't guaranteed
+    after every swipe; ``user_fingerprint`` makes it sticky per user.
+    """
+    if user_embedding is None or user_embedding.size == 0 or not np.any(user_embedding):
+        return "cold"
+    dim = user_embedding.size
+    planes = _planes.get(dim)
+    if planes is None or planes.shape[0] < bits:
+        # Fixed seed: every worker buckets the same profile the same way.
+        planes = _planes[dim] = np.random.default_rng(0).standard_normal((bits, dim))
+    signs = planes[:bits] @ user_embedding > 0
+    return "t" + "".join("1" if sign else "0" for sign in signs)
+
+
+def user_fingerprint(
+    user_id, user_embedding: np.ndarray | None, states: ShardedUserState = user_states
+) -> str:
+    """``taste_fingerprint`` that stays put while the user's profile drifts slowly.
+
+    A single EMA step moves the profile only a few degrees, but that's enough
+    to cross a bucket boundary now and then. The bucket is kept in the user's
+    state with the profile it was computed from, and only recomputed once the
+    profile has moved further than ``CHAT_CACHE_TASTE_DRIFT`` from it.
+    """
+    if user_id is None or user_embedding is None or not np.any(user_embedding):
+        return taste_fingerprint(user_embedding)
+    unit = user_embedding / np.linalg.norm(user_embedding)
+    state = states.get(user_id)
+    with state.lock:
+        anchor = state.taste_anchor
+        if (
+            anchor is not None
+            and anchor[0].shape == unit.shape
+            and anchor[0] @ unit >= CHAT_CACHE_TASTE_DRIFT
+        ):
+            return anchor[1]
+        fingerprint = taste_fingerprint(unit)
+        state.taste_anchor = (unit, fingerprint)
+        return fingerprint
+
+
+class SemanticCache:
+    """Fixed-size vector store with TTL and LRU eviction.
+
+    Question vectors live in one preallocated float32 matrix, so a lookup is a
+    single mat-vec over the slots that match the fingerprint and haven't expired.
+    """
+
+    def __init__(
+        self,
+        size: int = CHAT_CACHE_SIZE,
+        threshold: float = CHAT_CACHE_THRESHOLD,
+        ttl: float = CHAT_CACHE_TTL,
+    ):
+        self.size = size
+        self.threshold = threshold
+        self.ttl = ttl
+        self._vectors: np.ndarray | None = None
+        self._expires = np.zeros(size)
+        self._fingerprints = np.full(size, None, dtype=object)
+        self._answers: list[str | None] = [None] * size
+        self._exact: dict[tuple[str, str], int] = {}
+        self._texts: list[tuple[str, str] | None] = [None] * size
+        self._lru: OrderedDict[int, None] = OrderedDict()
+        self._free_slots = list(range(size - 1, -1, -1))
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "exact_hits": 0, "evictions": 0}
+
+    def _free(self, slot: int):
+        text_key = self._texts[slot]
+        if text_key is not None and self._exact.get(text_key) == slot:
+            del self._exact[text_key]
+        self._fingerprints[slot] = self._answers[slot] = self._texts[slot] = None
+        self._expires[slot] = 0
+        if slot in self._lru:
+            del self._lru[slot]
+            self._free_slots.append(slot)
+
+    def _hit(self, slot: int) -> str:
+        self._lru.move_to_end(slot)
+        self._stats["hits"] += 1
+        return self._answers[slot]  # type: ignore[return-value]
+
+    def get_exact(self, question: str, fingerprint: str) -> str | None:
+        """Free lookup by normalised text, before paying for an embedding."""
+        with self._lock:
+            slot = self._exact.get((question, fingerprint))
+            if slot is None:
+                return None
+            if self._expires[slot] < time.monotonic():
+                self._free(slot)
+                return None
+            self._stats["lookups"] += 1
+            self._stats["exact_hits"] += 1
+            return self._hit(slot)
+
+    def get(self, vector: np.ndarray, fingerprint: str) -> str | None:
+        with self._lock:
+            self._stats["lookups"] += 1
+            if self._vectors is None or not self._lru:
+                return None
+            same_taste = self._fingerprints == fingerprint
+            live = np.flatnonzero(same_taste & (self._expires >= time.monotonic()))
+            for slot in np.flatnonzero(same_taste & (self._expires < time.monotonic())):
+                self._free(int(slot))
+            if live.size == 0:
+                return None
+            sims = self._vectors[live] @ vector
+            best = int(np.argmax(sims))
+            if sims[best] < self.threshold:
+                return None
+            return self._hit(int(live[best]))
+
+    def put(self, question: str, vector: np.ndarray, fingerprint: str, answer: str):
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.size, vector.size), dtype=np.float32)
+            if vector.size != self._vectors.shape[1]:
+                return
+            if not self._free_slots:
+                self._free(next(iter(self._lru)))
+                self._stats["evictions"] += 1
+            slot = self._free_slots.pop()
+            self._vectors[slot] = vector
+            self._fingerprints[slot] = fingerprint
+            self._answers[slot] = answer
+            self._texts[slot] = (question, fingerprint)
+            self._exact[(question, fingerprint)] = slot
+            self._expires[slot] = time.monotonic() + self.ttl
+            self._lru[slot] = None
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._lru)
+        stats["hit_rate"] = round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+        return stats
+
+
+chat_cache = SemanticCache()
+
+
+def cached_chat(
+    message: str,
+    history: list[dict],
+    user_embedding: np.ndarray | None = None,
+    user_id=None,
+) -> str:
+    """``chat_with_gemini`` behind the semantic cache.
+
+    Only standalone questions (no prior turns) are cached: a follow-up's
+    meaning depends on the conversation, not just its own text.
+    """
+    # The frontend sends the history including the message being asked.
+    prior = history[:-1] if history and history[-1].get("content") == message else history
+    if prior:
+        return chat_with_gemini(message, history)
+
+    question = normalize_question(message)
+    fingerprint = user_fingerprint(user_id, user_embedding)
+    answer = chat_cache.get_exact(question, fingerprint)
+    if answer is not None:
+        return answer
+
+    try:
+        vector = np.asarray(create_embedding(question), dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+    except EmbeddingError as exc:
+        print(f"[chat-cache] Skipping cache: {exc}")
+        return chat_with_gemini(message, history)
+
+    answer = chat_cache.get(vector, fingerprint)
+    if answer is not None:
+        return answer
+
+    answer = chat_with_gemini(message, history)
+    if answer:
+        chat_cache.put(question, vector, fingerprint, answer)
+    return answer
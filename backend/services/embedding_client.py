@@ -1,9 +1,12 @@
 import os
 from typing import Iterable
-from services.gemini_client import GEMINI_API_KEY, client
+from services.gemini_client import GEMINI_API_KEY, client, gemini
+from services.rate_limit import GeminiUnavailable
 
 # Configure via environment variables
 EMBEDDING_MODEL = os.getenv("GEMINI_EMBED_MODEL", "models/text-embedding-004")
+# Gemini accepts at most 100 texts per embed_content call.
+EMBED_BATCH_SIZE = 100
 
 
 class EmbeddingError(RuntimeError):
@@ -49,11 +52,13 @@ def create_embedding(text: str):
         raise EmbeddingError("Cannot embed empty text.")
 
     try:
-        response = client.models.embed_content(
+        response = gemini.embed_content(
             model=EMBEDDING_MODEL,
             contents=text,
         )
         return response.embeddings[0].values  # type: ignore[attr-defined]
+    except GeminiUnavailable:
+        raise
     except Exception as exc:  # noqa: BLE001
         raise EmbeddingError(f"Failed to create embedding: {exc}") from exc
 
@@ -66,3 +71,33 @@ def embed_product(product: dict) -> list[float]:
     """
     prompt = build_product_text(product)
     return create_embedding(prompt)  # type: ignore
+
+
+def create_embeddings(texts: list[str]) -> list[list[float]]:
+    """Embed many texts, sending up to EMBED_BATCH_SIZE per request."""
+    if not GEMINI_API_KEY or not client:
+        raise EmbeddingError(
+            "Gemini client not available; set GEMINI_API_KEY and install google-genai."
+        )
+    if any(not text for text in texts):
+        raise EmbeddingError("Cannot embed empty text.")
+
+    vectors: list[list[float]] = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        batch = texts[start : start + EMBED_BATCH_SIZE]
+        try:
+            response = gemini.embed_content(
+                model=EMBEDDING_MODEL,
+                contents=batch,  # type: ignore[arg-type]
+            )
+        except GeminiUnavailable:
+            raise
+        except Exception as exc:  # noqa: BLE001
+            raise EmbeddingError(f"Failed to create embeddings: {exc}") from exc
+        vectors.extend(e.values for e in response.embeddings)  # type: ignore[union-attr]
+    return vectors
+
+
+def embed_products(products: list[dict]) -> list[list[float]]:
+    """Batch version of embed_product; vectors come back in input order."""
+    return create_embeddings([build_product_text(product) for product in products])
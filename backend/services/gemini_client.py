@@ -1,5 +1,6 @@
 import os
 from google import genai  # Gemini SDK
+from services.rate_limit import RateLimitedClient
 
 SYSTEM_PROMPT = """
 You are a friendly fashion assistant inside a web app that works like Tinder for clothes and outfits.
@@ -17,6 +18,19 @@ When you answer:
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 client = genai.Client(api_key=GEMINI_API_KEY)
 
+# GEMINI_RPM / GEMINI_TPM / GEMINI_MAX_CONCURRENCY are the project-wide budget.
+# Each worker process enforces its own share, so it is split across the
+# WEB_CONCURRENCY workers (gunicorn reads the same variable for its -w default).
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+# Every Gemini call in the process goes through this shared, quota-aware wrapper.
+gemini = RateLimitedClient(
+    client,
+    requests_per_minute=float(os.getenv("GEMINI_RPM", "60")) / WORKERS,
+    tokens_per_minute=float(os.getenv("GEMINI_TPM", "1000000")) / WORKERS,
+    max_concurrency=max(1, int(os.getenv("GEMINI_MAX_CONCURRENCY", "8")) // WORKERS),
+)
+
 def chat_with_gemini(message: str, history: list[dict]) -> str:
     """Builds the prompt and returns Gemini's reply text."""
     contents = []
@@ -40,7 +54,7 @@ def chat_with_gemini(message: str, history: list[dict]) -> str:
         "parts": [{"text": message}],
     })
 
-    resp = client.models.generate_content(
+    resp = gemini.generate_content(
         model="gemini-2.0-flash",
         contents=contents,
     )
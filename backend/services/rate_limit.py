@@ -0,0 +1,253 @@
+"""
+Rate limiting, backpressure and circuit breaking for outbound model calls.
+
+``RateLimitedClient`` wraps the Gemini SDK client so every caller in the
+process shares one request/token budget and one concurrency limit. Calls that
+hit a 429 or 5xx are retried with exponential backoff; repeated failures open
+a circuit breaker so requests fail fast instead of piling up behind a quota
+that is already exhausted.
+"""
+
+import random
+import threading
+import time
+
+
+class GeminiUnavailable(RuntimeError):
+    """Raised when a call is rejected by the limiter, the circuit is open, or
+    retries on 429/5xx are exhausted."""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``rate_per_minute``."""
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0, timeout: float | None = None) -> bool:
+        """Block until ``amount`` tokens are available. False on timeout."""
+        amount = min(amount, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return True
+                wait = (amount - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+
+class CircuitBreaker:
+    """Open after ``failure_threshold`` consecutive failures; probe after ``reset_timeout``."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_timeout:
+                return False
+            # Let one probe through per reset window; everyone else keeps failing fast.
+            self.state = self.HALF_OPEN
+            self._opened_at = now
+            return True
+
+    def retry_after(self) -> float:
+        with self._lock:
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+def _status_code(exc: Exception) -> int | None:
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_retryable(exc: Exception) -> bool:
+    code = _status_code(exc)
+    return code == 429 or (code is not None and 500 <= code < 600)
+
+
+def estimate_tokens(contents) -> int:
+    """Rough token count (~4 characters per token) of SDK ``contents``."""
+    if contents is None:
+        return 0
+    if isinstance(contents, str):
+        return len(contents) // 4 + 1
+    if isinstance(contents, dict):
+        return sum(estimate_tokens(value) for value in contents.values())
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_tokens(item) for item in contents)
+    return 0
+
+
+class RateLimitedClient:
+    """Shared, quota-aware front for ``genai.Client.models``."""
+
+    def __init__(
+        self,
+        client,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_concurrency: int = 8,
+        max_retries: int = 4,
+        base_delay: float = 0.5,
+        max_delay: float = 16.0,
+        queue_timeout: float = 30.0,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.client = client
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_concurrency = max_concurrency
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.queue_timeout = queue_timeout
+        self.breaker = breaker or CircuitBreaker()
+
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._in_flight = 0
+        self._stats = {"calls": 0, "retries": 0, "throttled": 0, "rejected": 0, "failed": 0}
+
+    def _count(self, name: str, delta: int = 1):
+        with self._lock:
+            self._stats[name] += delta
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2**attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _call(self, fn, tokens: int, **kwargs):
+        if self.client is None:
+            raise GeminiUnavailable("Gemini client is not configured")
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise GeminiUnavailable(
+                "Gemini is temporarily unavailable", retry_after=self.breaker.retry_after()
+            )
+
+        deadline = time.monotonic() + self.queue_timeout
+        with self._lock:
+            self._waiting += 1
+        try:
+            got_slot = self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        if not got_slot:
+            self._count("rejected")
+            raise GeminiUnavailable("Gemini request queue is full", retry_after=self.base_delay)
+
+        with self._lock:
+            self._in_flight += 1
+            self._stats["calls"] += 1
+        try:
+            for attempt in range(self.max_retries + 1):
+                remaining = max(0.0, deadline - time.monotonic())
+                if not (
+                    self.requests.acquire(1, timeout=remaining)
+                    and self.tokens.acquire(tokens, timeout=remaining)
+                ):
+                    self._count("rejected")
+                    raise GeminiUnavailable("Gemini rate limit budget exhausted", retry_after=1.0)
+                try:
+                    result = fn(**kwargs)
+                except Exception as exc:  # noqa: BLE001
+                    if not is_retryable(exc):
+                        # Gemini answered; caller errors (bad request, auth) don't trip the breaker.
+                        self.breaker.record_success()
+                        raise
+                    if _status_code(exc) == 429:
+                        self._count("throttled")
+                    if attempt == self.max_retries:
+                        self.breaker.record_failure()
+                        self._count("failed")
+                        if self.breaker.state == CircuitBreaker.OPEN:
+                            retry_after = self.breaker.retry_after()
+                        else:
+                            retry_after = self._backoff(attempt)
+                        # Quota/outage, not a bug: callers answer 503 with Retry-After.
+                        raise GeminiUnavailable(
+                            f"Gemini unavailable after {attempt + 1} attempts: {exc}",
+                            retry_after=retry_after,
+                        ) from exc
+                    self._count("retries")
+                    time.sleep(self._backoff(attempt))
+                    continue
+                self.breaker.record_success()
+                return result
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def embed_content(self, **kwargs):
+        tokens = estimate_tokens(kwargs.get("contents"))
+        return self._call(self.client and self.client.models.embed_content, tokens, **kwargs)
+
+    def generate_content(self, **kwargs):
+        tokens = estimate_tokens(kwargs.get("contents"))
+        return self._call(self.client and self.client.models.generate_content, tokens, **kwargs)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(queue_depth=self._waiting, in_flight=self._in_flight)
+        stats.update(
+            max_concurrency=self.max_concurrency,
+            circuit=self.breaker.state,
+            request_budget=round(self.requests.available, 1),
+            token_budget=round(self.tokens.available),
+        )
+        return stats
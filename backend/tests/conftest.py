@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Run from any directory: the backend modules import each other top-level.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Clients are created at import time; tests never reach them over the network.
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test")
+os.environ.setdefault("GEMINI_API_KEY", "test")
@@ -0,0 +1,204 @@
+"""
+In-memory stand-in for the parts of the supabase-py query builder the
+backend uses: ``select``, the ``eq``/``gt``/``in_``/``or_`` filters,
+``order``, ``limit``, ``range``, ``single``/``maybe_single`` and
+``insert``/``upsert``/``update``/``delete``.
+"""
+
+import re
+from types import SimpleNamespace
+
+
+def _split_top_level(expr: str) -> list[str]:
+    parts, depth, quoted, current = [], 0, False, ""
+    for char in expr:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(current)
+            current = ""
+            continue
+        current += char
+    parts.append(current)
+    return parts
+
+
+def _coerce(value: str):
+    # PostgREST casts filter values to the column type; numbers are the only
+    # non-text columns the tests filter on.
+    if value.startswith('"') and value.endswith('"'):
+        value = value[1:-1]
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+_OPS = {
+    "eq": lambda a, b: a == b,
+    "gt": lambda a, b: a is not None and a > b,
+    "gte": lambda a, b: a is not None and a >= b,
+    "lt": lambda a, b: a is not None and a < b,
+    "lte": lambda a, b: a is not None and a <= b,
+}
+
+
+def _parse_logic(expr: str):
+    """Predicate for a PostgREST logic tree such as ``a.gt.1,and(b.eq.2,c.lt.3)``."""
+    terms = []
+    for part in _split_top_level(expr):
+        match = re.fullmatch(r"(and|or)\((.*)\)", part)
+        if match:
+            combine = _parse_logic if match.group(1) == "or" else _all_of
+            terms.append(combine(match.group(2)))
+            continue
+        column, op, value = part.split(".", 2)
+        terms.append(lambda row, c=column, o=_OPS[op], v=_coerce(value): o(row.get(c), v))
+    return lambda row: any(term(row) for term in terms)
+
+
+def _all_of(expr: str):
+    terms = [_parse_logic(part) for part in _split_top_level(expr)]
+    return lambda row: all(term(row) for term in terms)
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeClient", table: str):
+        self.client = client
+        self.table = table
+        self.action = "select"
+        self.payload = None
+        self.columns = None
+        self.filters = []
+        self.orders = []
+        self.window = None
+        self.one = False
+
+    # -- actions ---------------------------------------------------------------
+
+    def select(self, columns: str = "*"):
+        if columns.strip() != "*":
+            self.columns = [column.strip() for column in columns.split(",")]
+        return self
+
+    def insert(self, rows):
+        self.action, self.payload = "insert", rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: str = "id"):
+        self.action, self.payload = "upsert", rows if isinstance(rows, list) else [rows]
+        self.conflict = [column.strip() for column in on_conflict.split(",")]
+        return self
+
+    def update(self, values: dict):
+        self.action, self.payload = "update", values
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    # -- filters and modifiers ---------------------------------------------------
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: _OPS["gt"](row.get(column), value))
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def or_(self, expr: str):
+        self.filters.append(_parse_logic(expr))
+        return self
+
+    def order(self, column, desc: bool = False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count: int):
+        self.window = (0, count)
+        return self
+
+    def range(self, start: int, end: int):
+        self.window = (start, end - start + 1)
+        return self
+
+    def single(self):
+        self.one = True
+        return self
+
+    maybe_single = single
+
+    # -- execution ---------------------------------------------------------------
+
+    def _matches(self, row: dict) -> bool:
+        return all(test(row) for test in self.filters)
+
+    def execute(self):
+        self.client.queries.append(self)
+        rows = self.client.tables.setdefault(self.table, [])
+        if self.action == "insert":
+            created = []
+            for row in self.payload:
+                row = {"created_at": self.client.tick(), **row}
+                if "id" not in row:
+                    row["id"] = max((r["id"] for r in rows), default=0) + 1
+                rows.append(row)
+                created.append(dict(row))
+            return SimpleNamespace(data=created)
+        if self.action == "upsert":
+            for row in self.payload:
+                existing = next(
+                    (r for r in rows if all(r.get(c) == row.get(c) for c in self.conflict)), None
+                )
+                if existing is None:
+                    rows.append({"created_at": self.client.tick(), **row})
+                else:
+                    existing.update(row)
+            return SimpleNamespace(data=[dict(row) for row in self.payload])
+        matched = [row for row in rows if self._matches(row)]
+        if self.action == "update":
+            for row in matched:
+                row.update(self.payload)
+            return SimpleNamespace(data=[dict(row) for row in matched])
+        if self.action == "delete":
+            self.client.tables[self.table] = [row for row in rows if not self._matches(row)]
+            return SimpleNamespace(data=[dict(row) for row in matched])
+
+        for column, desc in reversed(self.orders):
+            matched.sort(key=lambda row: row.get(column), reverse=desc)
+        if self.window is not None:
+            start, count = self.window
+            matched = matched[start:start + count]
+        if self.columns is not None:
+            matched = [{c: row.get(c) for c in self.columns} for row in matched]
+        if self.one:
+            return SimpleNamespace(data=dict(matched[0]) if matched else None)
+        return SimpleNamespace(data=[dict(row) for row in matched])
+
+
+class FakeClient:
+    """Tables are plain lists of dicts in ``tables``; executed queries are
+    recorded in ``queries``. Inserted rows get an increasing ``created_at``."""
+
+    def __init__(self, **tables):
+        self.tables = {name: [dict(row) for row in rows] for name, rows in tables.items()}
+        self.queries: list[FakeQuery] = []
+        self._clock = 0
+
+    def tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
@@ -0,0 +1,33 @@
+import io
+
+from helpers.bulk_import import RowError, iter_rows
+
+
+def _rows(body: bytes, fmt: str):
+    return [(number, row if isinstance(row, dict) else str(row)) for number, row in iter_rows(io.BytesIO(body), fmt)]
+
+
+def test_invalid_utf8_line_fails_only_its_own_row():
+    rows = _rows(b'{"name":"a"}\n\xff\xfe\n{"name":"b"}\n', "jsonl")
+    assert rows == [(1, {"name": "a"}), (2, "Line is not valid UTF-8"), (3, {"name": "b"})]
+
+
+def test_invalid_utf8_csv_row_fails_only_its_own_row():
+    body = b'name,description\na,"two\nlines"\nb\xff,x\nc,ok\n'
+    rows = _rows(body, "csv")
+    assert rows == [
+        (1, {"name": "a", "description": "two\nlines"}),
+        (2, "Row is not valid UTF-8"),
+        (3, {"name": "c", "description": "ok"}),
+    ]
+
+
+def test_bad_byte_inside_multiline_csv_field_fails_that_row():
+    body = b'name,description\na,"first\nbad\xff"\nb,ok\n'
+    rows = _rows(body, "csv")
+    assert rows == [(1, "Row is not valid UTF-8"), (2, {"name": "b", "description": "ok"})]
+
+
+def test_row_errors_are_row_error_instances():
+    [(_, row)] = list(iter_rows(io.BytesIO(b"[1]\n"), "jsonl"))
+    assert isinstance(row, RowError)
@@ -0,0 +1,38 @@
+import pytest
+
+import db_service
+from catalog_replica import CatalogReplica, _ReplicaSync
+from tests.fakes import FakeClient
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient(
+        products=[
+            {"id": i, "name": f"red dress {i}", "embedding": [1.0, float(i)], "updated_at": f"t{i}"}
+            for i in range(1, 5)
+        ]
+    )
+    monkeypatch.setattr(db_service, "supabase", fake)
+    return fake
+
+
+def test_sync_drops_products_deleted_elsewhere(client, tmp_path):
+    replica = CatalogReplica(str(tmp_path / "catalog.sqlite3"))
+    sync = _ReplicaSync(replica, interval=0, client=client)
+    sync.initial_load()
+    assert sorted(replica.ids()) == [1, 2, 3, 4]
+
+    # Deleted from the console, and one product added.
+    client.tables["products"] = [p for p in client.tables["products"] if p["id"] != 2]
+    client.tables["products"].append({"id": 5, "name": "blue coat", "embedding": [0.0, 1.0], "updated_at": "t9"})
+
+    assert sync.sync_once() == 2
+    assert sorted(replica.ids()) == [1, 3, 4, 5]
+    assert replica.get(2) is None
+    assert [row["id"] for row in replica.search("red")] == [1, 3, 4]
+    assert 2 not in [row["id"] for row in replica.candidates([], limit=10)]
+
+    # A restart resumes from the stored mark and the deleted row stays gone.
+    restarted = _ReplicaSync(CatalogReplica(replica.path), interval=0, client=client)
+    assert restarted.sync_once() == 0
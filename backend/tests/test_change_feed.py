@@ -0,0 +1,118 @@
+import asyncio
+
+from helpers.change_feed import ChangeFeed, HighWaterMarkPoller, RealtimeSource
+from tests.fakes import FakeClient
+
+
+class Recorder:
+    def __init__(self):
+        self.upserts = []
+        self.deletes = []
+
+    def upsert(self, row):
+        self.upserts.append(row["id"])
+
+    def delete(self, product_id):
+        self.deletes.append(product_id)
+
+
+def _products(*pairs):
+    return [{"id": product_id, "name": f"p{product_id}", "updated_at": ts} for product_id, ts in pairs]
+
+
+def _poller(client, page_size=2):
+    feed = ChangeFeed()
+    recorder = feed.register(Recorder())
+    return HighWaterMarkPoller(feed, interval=0, page_size=page_size, client=client), recorder
+
+
+def test_pages_through_rows_sharing_a_timestamp():
+    # Five rows with the same updated_at span three pages of two; the id
+    # tie-break must carry the poller across page boundaries without
+    # repeating or skipping any of them.
+    client = FakeClient(products=_products((4, "t1"), (2, "t1"), (5, "t1"), (1, "t1"), (3, "t1"), (6, "t2")))
+    poller, recorder = _poller(client)
+
+    assert poller.poll_once() == 6
+    assert recorder.upserts == [1, 2, 3, 4, 5, 6]
+    assert poller.high_water_mark == ("t2", 6)
+
+
+def test_resumes_from_high_water_mark():
+    client = FakeClient(products=_products((1, "t1"), (2, "t1"), (3, "t2")))
+    poller, recorder = _poller(client)
+    poller.high_water_mark = ("t1", 1)
+
+    assert poller.poll_once() == 2
+    assert recorder.upserts == [2, 3]
+
+    # Nothing new: the next poll is empty and the mark stays put.
+    assert poller.poll_once() == 0
+    assert poller.high_water_mark == ("t2", 3)
+
+    # An edit bumps updated_at past the mark; a row inserted with the mark's
+    # timestamp but a lower id than the mark must not be replayed.
+    client.tables["products"][0]["updated_at"] = "t3"
+    client.tables["products"].append({"id": 0, "name": "p0", "updated_at": "t2"})
+    assert poller.poll_once() == 1
+    assert recorder.upserts == [2, 3, 1]
+    assert poller.high_water_mark == ("t3", 1)
+
+
+def test_seed_skips_existing_rows():
+    client = FakeClient(products=_products((1, "t1"), (3, "t2"), (2, "t2")))
+    poller, recorder = _poller(client)
+
+    poller.seed()
+    assert poller.high_water_mark == ("t2", 3)
+    assert poller.poll_once() == 0
+
+    client.tables["products"].append({"id": 4, "name": "p4", "updated_at": "t3"})
+    assert poller.poll_once() == 1
+    assert recorder.upserts == [4]
+
+
+class FakeChannel:
+    def __init__(self):
+        self.callback = None
+
+    def on_postgres_changes(self, event, schema, table, callback):
+        self.callback = callback
+
+    async def subscribe(self):
+        return self
+
+
+class FakeAsyncClient:
+    def __init__(self):
+        self.channels = []
+
+    def channel(self, name):
+        self.channels.append(FakeChannel())
+        return self.channels[-1]
+
+
+def test_realtime_forwards_events_from_injected_client():
+    feed = ChangeFeed()
+    recorder = feed.register(Recorder())
+    client = FakeAsyncClient()
+
+    async def connect():
+        return client
+
+    async def run():
+        stop = asyncio.Event()
+        source = RealtimeSource(feed, client_factory=connect)
+        listening = asyncio.create_task(source._listen(stop))
+        while not client.channels or client.channels[0].callback is None:
+            await asyncio.sleep(0)
+        callback = client.channels[0].callback
+        callback({"data": {"type": "INSERT", "record": {"id": 7}}})
+        callback({"data": {"type": "UPDATE", "record": {"id": 7}}})
+        callback({"data": {"type": "DELETE", "old_record": {"id": 7}}})
+        stop.set()
+        await listening
+
+    asyncio.run(run())
+    assert recorder.upserts == [7, 7]
+    assert recorder.deletes == [7]
@@ -0,0 +1,56 @@
+import numpy as np
+
+from helpers.neighbours import NeighbourTable, catch_up
+from tests.fakes import FakeClient
+
+
+def _products(n, dim=8, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"id": i, "name": f"p{i}", "embedding": rng.standard_normal(dim).tolist(), "updated_at": f"t{i:03d}"}
+        for i in range(1, n + 1)
+    ]
+
+
+def _ids(table, product_id):
+    return [row["id"] for row in table.similar(product_id)]
+
+
+def test_deleted_product_is_not_found():
+    table = NeighbourTable.build(_products(10), k=3)
+    table.delete(4)
+    assert table.similar(4) is None
+    assert all(4 not in _ids(table, pid) for pid in range(1, 11) if pid != 4)
+
+
+def test_catch_up_replays_changes_since_the_saved_mark(tmp_path):
+    products = _products(12)
+    table = NeighbourTable.build(products[:10], k=3, high_water_mark=("t010", 10))
+    path = str(tmp_path / "neighbours.npz")
+    table.save(path)
+
+    # After the build: two products added, one edited, one deleted elsewhere.
+    edited = dict(products[2], embedding=products[0]["embedding"], updated_at="t020")
+    current = [edited if p["id"] == 3 else p for p in products if p["id"] != 5]
+    client = FakeClient(products=current)
+
+    loaded = NeighbourTable.load(path)
+    assert loaded.high_water_mark == ("t010", 10)
+    assert catch_up(loaded, client=client) == 4
+    assert loaded.high_water_mark == ("t020", 3)
+
+    expected = NeighbourTable.build(current, k=3)
+    for row in current:
+        assert _ids(loaded, row["id"]) == _ids(expected, row["id"])
+    assert loaded.similar(5) is None
+    assert _ids(loaded, 1)[0] == 3
+
+
+def test_lookup_only_table_skips_the_vectors(tmp_path):
+    table = NeighbourTable.build(_products(6), k=2)
+    path = str(tmp_path / "neighbours.npz")
+    table.save(path)
+
+    lookups = NeighbourTable.load(path, with_vectors=False)
+    assert lookups.unit is None
+    assert _ids(lookups, 1) == _ids(table, 1)
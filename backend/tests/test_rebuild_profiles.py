@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import app.routes.swipes as swipes
+import db_service
+import helpers.rebuild_profiles as rebuild
+from helpers.user_state import user_states
+from tests.fakes import FakeClient
+
+USERS = (101, 102, 103)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    rng = np.random.default_rng(3)
+    products = [{"id": i, "embedding": rng.standard_normal(16).tolist()} for i in range(1, 41)]
+    products.append({"id": 41, "embedding": None})
+    fake = FakeClient(products=products, users=[], user_products=[])
+    for module in (swipes, db_service, rebuild):
+        monkeypatch.setattr(module, "supabase", fake)
+    monkeypatch.setattr(user_states, "loader", None)
+    yield fake
+    for user_id in USERS:
+        user_states.discard(user_id)
+
+
+def _profiles(client):
+    return {row["id"]: row for row in client.tables["users"]}
+
+
+def test_rebuild_matches_the_live_ema(client, monkeypatch):
+    rng = np.random.default_rng(4)
+    for user_id in USERS:
+        for product_id in rng.permutation(np.arange(1, 42))[:15]:
+            swipes.register_swipe(user_id, int(product_id), bool(rng.random() < 0.5))
+    live = _profiles(client)
+
+    # Small pages and chunks so users straddle page and chunk boundaries.
+    monkeypatch.setattr(rebuild, "PAGE_SIZE", 4)
+    stats = rebuild.rebuild_profiles(swipes.ALPHA, chunk_size=2)
+    rebuilt = _profiles(client)
+
+    assert stats["written"] == len(USERS) and stats["skipped"] == 0
+    for user_id in USERS:
+        assert rebuilt[user_id]["total_likes"] == live[user_id]["total_likes"]
+        assert rebuilt[user_id]["total_dislikes"] == live[user_id]["total_dislikes"]
+        np.testing.assert_allclose(
+            rebuilt[user_id]["embedding"], live[user_id]["embedding"], rtol=1e-5, atol=1e-6
+        )
+
+
+def test_rows_deleted_while_paging_do_not_skip_later_rows(client):
+    client.tables["user_products"] = [
+        {"user_id": u, "product_id": p, "liked": True, "created_at": p} for u in (1, 2, 3) for p in (1, 2)
+    ]
+    rows = db_service.iter_all(
+        "user_products",
+        "user_id, product_id, created_at",
+        page_size=2,
+        order=("user_id", "created_at", "product_id"),
+    )
+    seen = [next(rows), next(rows)]
+    # An undo removes a row from the page already read.
+    del client.tables["user_products"][0]
+    seen += list(rows)
+    assert [(r["user_id"], r["product_id"]) for r in seen] == [(u, p) for u in (1, 2, 3) for p in (1, 2)]
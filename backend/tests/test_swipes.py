@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+import app.routes.swipes as swipes
+from helpers.user_state import user_states
+from tests.fakes import FakeClient
+
+USER = 7
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient(
+        products=[{"id": 1, "embedding": [1.0, 0.0]}, {"id": 2, "embedding": [0.0, 1.0]}],
+        users=[],
+        user_products=[],
+    )
+    monkeypatch.setattr(swipes, "supabase", fake)
+    monkeypatch.setattr(user_states, "loader", None)
+    user_states.discard(USER)
+    yield fake
+    user_states.discard(USER)
+
+
+def test_swipe_and_undo_drop_the_pending_batch(client):
+    state = user_states.get(USER)
+    state.pending = [({"id": 2}, None)]
+    swipes.register_swipe(USER, 1, liked=False)
+    assert state.pending == []
+
+    state.pending = [({"id": 2}, None)]
+    assert swipes.undo_last_swipe(USER) == {"product_id": 1, "liked": False}
+    assert state.pending == []
+
+
+def _profile(client):
+    [row] = [row for row in client.tables["users"] if row["id"] == USER]
+    return np.array(row["embedding"]), row["total_likes"], row["total_dislikes"]
+
+
+def _swiped(client):
+    return sorted(row["product_id"] for row in client.tables["user_products"] if row["user_id"] == USER)
+
+
+def test_undo_restores_this_workers_snapshot(client):
+    swipes.register_swipe(USER, 1, liked=True)
+    after_first = _profile(client)
+    swipes.register_swipe(USER, 2, liked=True)
+
+    assert swipes.undo_last_swipe(USER) == {"product_id": 2, "liked": True}
+    embedding, likes, dislikes = _profile(client)
+    np.testing.assert_allclose(embedding, after_first[0], rtol=1e-6)
+    assert (likes, dislikes) == (1, 0)
+    assert _swiped(client) == [1]
+
+
+def test_undo_inverts_a_swipe_another_worker_handled(client):
+    swipes.register_swipe(USER, 1, liked=True)
+    after_first = _profile(client)
+    swipes.register_swipe(USER, 2, liked=False)
+    # Swipe 2 went to another worker: this one only remembers swipe 1.
+    user_states.get(USER).history.pop()
+
+    assert swipes.undo_last_swipe(USER) == {"product_id": 2, "liked": False}
+    embedding, likes, dislikes = _profile(client)
+    np.testing.assert_allclose(embedding, after_first[0], atol=1e-9)
+    assert (likes, dislikes) == (1, 0)
+    assert _swiped(client) == [1]
+    # The stale snapshot for swipe 1 is gone too; the next undo inverts it.
+    assert not user_states.get(USER).history
+
+
+def test_undo_does_not_restore_over_a_rebuilt_profile(client):
+    swipes.register_swipe(USER, 1, liked=True)
+    swipes.register_swipe(USER, 2, liked=True)
+    # A profile rebuild rewrote the vector after swipe 2.
+    rebuilt = np.array([0.5, 0.5])
+    swipes.upsert_user_profile(USER, rebuilt, 2, 0)
+
+    swipes.undo_last_swipe(USER)
+    embedding, likes, _ = _profile(client)
+    expected = (rebuilt - swipes.ALPHA * np.array([0.0, 1.0])) / (1 - swipes.ALPHA)
+    np.testing.assert_allclose(embedding, expected)
+    assert likes == 1
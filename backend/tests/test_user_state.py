@@ -0,0 +1,38 @@
+import threading
+
+from helpers.user_state import ShardedUserState
+
+
+def test_eviction_skips_states_whose_lock_is_held():
+    states = ShardedUserState(shards=1, max_users=2)
+    busy = states.get(1)
+    states.get(2)
+
+    held, release = threading.Event(), threading.Event()
+
+    def hold():
+        with busy.lock:
+            held.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait()
+    try:
+        # User 1 is least recent but in use: user 2 is dropped instead.
+        states.get(3)
+        assert states.get(1) is busy
+        assert len(states) == 2
+    finally:
+        release.set()
+        holder.join()
+
+
+def test_eviction_drops_least_recent_idle_state():
+    states = ShardedUserState(shards=1, max_users=2)
+    first = states.get(1)
+    states.get(2)
+    states.get(1)
+    states.get(3)
+    assert states.get(1) is first
+    assert states.metrics()["users"] == 2
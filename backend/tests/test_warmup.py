@@ -0,0 +1,27 @@
+import time
+
+from app.warmup import FAILED, READY, RUNNING, TIMED_OUT, Readiness
+
+
+def _readiness(past_deadline: bool, **statuses):
+    readiness = Readiness()
+    for name, status in statuses.items():
+        readiness.register(name)
+        readiness.update(name, status)
+    readiness.deadline = time.monotonic() + (-1 if past_deadline else 60)
+    return readiness
+
+
+def test_slow_components_degrade_after_the_deadline():
+    assert not _readiness(False, a=READY, b=RUNNING).ready
+    degraded = _readiness(True, a=READY, b=RUNNING, c=TIMED_OUT)
+    assert degraded.ready and degraded.degraded
+
+
+def test_failed_component_stays_unready_past_the_deadline():
+    readiness = _readiness(True, supabase=FAILED, scoring=READY)
+    assert not readiness.ready
+    assert readiness.failed == ["supabase"]
+
+    readiness.update("supabase", READY)
+    assert readiness.ready and not readiness.degraded
@@ -1,3 +1,7 @@
+import os
+
 from app import create_app
 
-app = create_app()
+# Prod unless told otherwise, so a WSGI deployment never serves token-less
+# requests as the dev user; ./run.sh and the README's dev command set Dev.
+app = create_app(os.getenv("APP_CONFIG", "Prod"))
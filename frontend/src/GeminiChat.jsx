@@ -1,7 +1,6 @@
 // src/GeminiChat.jsx
 import { useState } from "react";
-
-const API_BASE = "http://localhost:5000";
+import { api } from "./lib/api";
 
 export default function GeminiChat() {
     const [history, setHistory] = useState([]);
@@ -20,13 +19,8 @@ export default function GeminiChat() {
         setLoading(true);
 
         try {
-            const res = await fetch(`${API_BASE}/api/chat`, {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({ message: trimmed, history: newHistory }),
-            });
-            if (!res.ok) throw new Error(`HTTP ${res.status}`);
-            const data = await res.json();
+            // Through the API client so the request carries the shopper's token.
+            const data = await api.chat({ message: trimmed, history: newHistory });
             setHistory((h) => [...h, { role: "model", content: data.reply }]);
         } catch (err) {
             console.error(err);
@@ -11,14 +11,28 @@ const API_BASE_URL = (() => {
 class APIClient {
   constructor() {
     this.baseURL = API_BASE_URL;
+    this.accessToken = null;
+    this.authPending = null;
+  }
+
+  // Supabase session access token; identifies the shopper on swipe/feed/chat calls
+  setAccessToken(token) {
+    this.accessToken = token || null;
+  }
+
+  // Requests wait for this (the initial sign-in) so the first calls carry a token
+  setAuthPending(promise) {
+    this.authPending = promise ? promise.catch(() => {}) : null;
   }
 
   async request(endpoint, options = {}) {
+    if (this.authPending) await this.authPending;
     const url = `${this.baseURL}${endpoint}`;
     const config = {
       ...options,
       headers: {
         'Content-Type': 'application/json',
+        ...(this.accessToken ? { Authorization: `Bearer ${this.accessToken}` } : {}),
         ...options.headers,
       },
     };
@@ -77,6 +91,19 @@ class APIClient {
     });
   }
 
+  // Reverts the most recent swipe; responds with { product_id, liked }
+  async undoSwipe() {
+    return this.request('/undo-swipe', { method: 'POST' });
+  }
+
+  // Style assistant; responds with { reply }
+  async chat({ message, history }) {
+    return this.request('/chat', {
+      method: 'POST',
+      body: JSON.stringify({ message, history }),
+    });
+  }
+
   // Deprecated: use registerSwipe instead
   async recordSwipe(productId, direction) {
     return this.registerSwipe({
@@ -227,6 +254,22 @@ class APIClient {
     });
   }
 
+  /**
+   * Bulk import products from a JSONL or CSV file
+   * POST /api/dashboard/products/bulk
+   * Body: raw file contents (streamed)
+   * Response: { results: [{ row, status, id?, error? }], summary }
+   * (201 when every row went in, 207 when some failed; check summary.failed)
+   */
+  async bulkImportProducts(file) {
+    const isCsv = file.name?.toLowerCase().endsWith('.csv') || file.type === 'text/csv';
+    return this.request('/dashboard/products/bulk', {
+      method: 'POST',
+      headers: { 'Content-Type': isCsv ? 'text/csv' : 'application/x-ndjson' },
+      body: file,
+    });
+  }
+
   /**
    * Update existing product
    * PUT /api/dashboard/products/:id
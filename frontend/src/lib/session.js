@@ -0,0 +1,60 @@
+import { api } from './api';
+
+// Supabase Auth session behind the API's Authorization header.
+// Shoppers don't log in: the first visit signs in anonymously, and the refresh
+// token kept in localStorage brings later visits back to the same auth user,
+// so their swipes and taste profile follow them. Needs anonymous sign-ins
+// enabled in the Supabase project.
+const SUPABASE_URL = (import.meta.env.VITE_SUPABASE_URL || '').replace(/\/$/, '');
+const SUPABASE_ANON_KEY = import.meta.env.VITE_SUPABASE_ANON_KEY;
+const STORAGE_KEY = 'trendswipe-auth';
+// Refresh this long before the access token expires.
+const REFRESH_MARGIN_MS = 60_000;
+
+let refreshTimer = null;
+
+async function authRequest(path, body) {
+  const response = await fetch(`${SUPABASE_URL}/auth/v1${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', apikey: SUPABASE_ANON_KEY },
+    body: JSON.stringify(body),
+  });
+  if (!response.ok) throw new Error(`Auth HTTP ${response.status}`);
+  return response.json();
+}
+
+function applySession(session) {
+  localStorage.setItem(STORAGE_KEY, JSON.stringify({ refresh_token: session.refresh_token }));
+  api.setAccessToken(session.access_token);
+  clearTimeout(refreshTimer);
+  const delay = Math.max(0, session.expires_in * 1000 - REFRESH_MARGIN_MS);
+  refreshTimer = setTimeout(() => {
+    refreshSession().catch((error) => console.error('Session refresh failed:', error));
+  }, delay);
+}
+
+async function refreshSession() {
+  const stored = JSON.parse(localStorage.getItem(STORAGE_KEY) || 'null');
+  if (!stored?.refresh_token) throw new Error('No stored session');
+  applySession(
+    await authRequest('/token?grant_type=refresh_token', { refresh_token: stored.refresh_token })
+  );
+}
+
+async function signIn() {
+  try {
+    await refreshSession();
+  } catch {
+    applySession(await authRequest('/signup', {}));
+  }
+}
+
+// Call once on startup; API requests wait for it so they carry the token.
+export function startSession() {
+  if (!SUPABASE_URL || !SUPABASE_ANON_KEY) {
+    // Local dev without Supabase Auth: the Dev backend serves the dev user.
+    return;
+  }
+  const pending = signIn().catch((error) => console.error('Sign-in failed:', error));
+  api.setAuthPending(pending);
+}